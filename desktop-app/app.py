@@ -5,24 +5,57 @@ from tkinter import messagebox
 import threading
 import json
 import os
+import contextlib
+import contextvars
 import queue
 import sys
+import time
 
 # For AIScreenReaderAgent
-import win32gui
-import win32ui
-import win32con
-import pyautogui
 from PIL import Image
-import pyttsx3
-import time
-import google.generativeai as genai
-from murf import Murf
-import io
-import requests
-import re
-import pygame
 
+from capture import ParallelCapture, create_capture_backend, stitch
+from engine import (
+    PRIORITY_BACKGROUND,
+    PRIORITY_INTERACTIVE,
+    PRIORITY_PREFETCH,
+    AgentEngine,
+    CancelToken,
+    JobCancelled,
+)
+from frame_diff import AnalysisCache, content_hash
+from frame_history import FrameHistories, FrameHistory
+from metrics import Metrics
+from playback import PlaybackEngine
+from prefetch import ForegroundTracker, PrefetchCache, WindowPrefetcher
+from preprocess import ImagePreprocessor
+from prompts import (
+    SYSTEM_PROMPT,
+    build_analysis_prompt,
+    build_batch_prompt,
+    split_batch_answers,
+)
+from providers import (
+    ProviderRegistry,
+    create_audio_mixer,
+    create_gemini_model,
+    create_murf_client,
+    create_local_speech,
+)
+from question_batch import QuestionBatcher
+from resilience import ResilientCaller
+from session import NEED_SCREEN, SessionContext
+from text_segment import (
+    FIRST_CHUNK_CHARS,
+    MAX_CHUNK_CHARS,
+    SentenceSegmenter,
+    chunk_sentences,
+    clean_for_speech,
+    iter_sentences,
+)
+from transcript import TranscriptBuffer
+from tts_cache import AudioCache
+from watch import ScreenWatcher, changed_regions
 
 if sys.prefix != sys.base_prefix:
     # Hardcoding the Tcl/Tk library paths as working in virtual environments causes issues with Tkinter.
@@ -57,40 +90,171 @@ if sys.prefix != sys.base_prefix:
 
 
 class AIScreenReaderAgent:
-    def __init__(self, status_callback=None, response_callback=None):
+    def __init__(
+        self, status_callback=None, response_callback=None, response_part_callback=None
+    ):
         """Initialize the agent with callbacks to update the GUI."""
         self.status_callback = status_callback
         self.response_callback = response_callback
+        self.response_part_callback = response_part_callback
         self.google_api_key = None
         self.murf_api_key = None
         self.tts_provider = "pyttsx3"
 
-        self.gemini_model = None
-        self.tts_engine = None
-        self.murf_client = None
-
-        self.is_reading = False
-        self.reading_thread = None
-        self.conversation_history = []
-
-        self.system_prompt = """You are an intelligent screen reading assistant. Your job is to:
-1. Analyze screen content and provide intelligent summaries
-2. Answer questions about what's on screen
-3. Identify key information, actionable items, and important elements
-4. Be conversational, helpful, and concise. Focus on what's most important or relevant."""
+        # Heavy backends are imported and initialized on first use
+        self.providers = ProviderRegistry(log=self.log_status)
+        self.providers.register("capture", create_capture_backend)
+        self.providers.register(
+            "parallel_capture", lambda: ParallelCapture(self.providers.get("capture"))
+        )
+        self.providers.register("audio", create_audio_mixer)
+        self.providers.register(
+            "player", lambda: PlaybackEngine(self.providers.get("audio"))
+        )
+        self.tts_cache = None
+        self.capture_lock = threading.Lock()
+        self.metrics = Metrics()
+        self.monitors = None
+        self.monitors_listed_at = 0.0
+        self.analysis_cache = AnalysisCache(max_entries=64)
+
+        self.engine = AgentEngine(on_error=self.report_job_error)
+        self.speech_lock = threading.Lock()
+        self.active_token = None
+        self.active_priority = None
+        self.default_session = self.new_session()
+        self._session_local = threading.local()
+
+        self.system_prompt = SYSTEM_PROMPT
 
         self.user_preferences = {
             "murf_voice_id": "en-US-natalie",
             "murf_style": "conversational",
+            "image_max_pixels": 1_600_000,
+            "image_format": "JPEG",
+            "image_quality": 80,
+            "image_grayscale": False,
+            "image_strip_taskbar": True,
+            "image_taskbar_px": 0,
+            "stream_responses": True,
+            "tts_cache_dir": "tts_cache",
+            "tts_cache_max_mb": 200,
+            "watch_fps": 1.0,
+            "watch_max_calls_per_minute": 4,
+            "show_metrics_in_status": False,
+            "llm_deadline_s": 30.0,
+            "tts_deadline_s": 20.0,
+            "hedge_requests": False,
+            "history_max_mb": 64,
+            "history_compare_s": 60,
+            "history_max_regions": 4,
+            "prefetch_windows": False,
+            "prefetch_stable_s": 1.0,
+            "prefetch_max_calls_per_minute": 4,
+            "question_batch_window_s": 0.3,
+            "question_batch_max": 5,
+            "capture_target": "primary",
+            "capture_regions": {},
+            "monitor_layout": "stitched",
         }
+        self.preprocessor = None
+        self.setup_preprocessor()
+        self.gemini_caller = self.create_caller("gemini", "llm_deadline_s")
+        self.histories = FrameHistories(self.user_preferences["history_max_mb"] * 1024 * 1024)
+        self.setup_pyttsx3()
+        self.watcher = None
+        self.foreground = ForegroundTracker(self)
+        self.prefetch_cache = PrefetchCache(max_entries=8)
+        self.prefetcher = None
+        self.question_batcher = QuestionBatcher(
+            self.submit_questions,
+            window_s=self.user_preferences["question_batch_window_s"],
+            max_questions=self.user_preferences["question_batch_max"],
+        )
+
+    @property
+    def gemini_model(self):
+        return self._provider("gemini", "Error configuring Gemini")
+
+    @gemini_model.setter
+    def gemini_model(self, model):
+        self.providers.set("gemini", model)
+
+    @property
+    def tts_engine(self):
+        return self._provider("pyttsx3", "Error configuring pyttsx3")
+
+    @tts_engine.setter
+    def tts_engine(self, engine):
+        self.providers.set("pyttsx3", engine)
+
+    @property
+    def murf_client(self):
+        return self._provider("murf_client", "Error configuring Murf AI")
 
-        # Initialize pygame mixer for audio playback
+    @murf_client.setter
+    def murf_client(self, client):
+        self.providers.set("murf_client", client)
+
+    @property
+    def murf_synth(self):
         try:
-            pygame.mixer.init()
-        except pygame.error as e:
-            self.log_status(
-                f"Error initializing pygame mixer: {e}. Murf TTS may not work."
-            )
+            return self.providers.get("murf")
+        except Exception as e:
+            self.log_status(f"Error configuring Murf AI: {e}. Falling back to pyttsx3.")
+            self.tts_provider = "pyttsx3"
+            return None
+
+    @murf_synth.setter
+    def murf_synth(self, synth):
+        self.providers.set("murf", synth)
+
+    @property
+    def capture_backend(self):
+        return self.providers.get("capture")
+
+    @capture_backend.setter
+    def capture_backend(self, backend):
+        self.providers.set("capture", backend)
+        # Drop the parallel grabber and monitor list built on the old backend
+        self.providers.register(
+            "parallel_capture", lambda: ParallelCapture(self.providers.get("capture"))
+        )
+        self.monitors = None
+
+    def _provider(self, name, error_message):
+        try:
+            return self.providers.get(name)
+        except Exception as e:
+            self.log_status(f"{error_message}: {e}")
+            return None
+
+    @property
+    def session(self) -> SessionContext:
+        """The conversation for the current thread: one set with ``use_session``,
+        or the app's own."""
+        return getattr(self._session_local, "session", None) or self.default_session
+
+    def new_session(self) -> SessionContext:
+        return SessionContext(summarize=self.summarize_conversation)
+
+    @contextlib.contextmanager
+    def use_session(self, session: SessionContext):
+        """Run agent calls on this thread against a separate conversation."""
+        previous = getattr(self._session_local, "session", None)
+        self._session_local.session = session
+        try:
+            yield session
+        finally:
+            self._session_local.session = previous
+
+    @property
+    def is_reading(self) -> bool:
+        return self.active_token is not None or bool(self.engine.active_jobs())
+
+    def report_job_error(self, job, error):
+        """Show an engine job that failed with an unexpected error."""
+        self.log_status(f"Error: {job.name} failed: {error}")
 
     def log_status(self, message):
         """Send status updates to the GUI."""
@@ -106,6 +270,14 @@ class AIScreenReaderAgent:
         else:
             print(f"{role.capitalize()}: {content}")
 
+    def log_response_part(self, role, content, done=False):
+        """Send one streamed piece of a response to the GUI. Pieces carry
+        their own spacing and line breaks, so they are shown as they are."""
+        if self.response_part_callback:
+            self.response_part_callback(role, content, done)
+        else:
+            print(content, end="\n" if done else "", flush=True)
+
     def configure(
         self,
         google_api_key,
@@ -113,212 +285,893 @@ class AIScreenReaderAgent:
         tts_provider="pyttsx3",
         murf_voice_id="en-US-natalie",
     ):
-        """Configure API keys and settings from the GUI."""
+        """Configure API keys and settings from the GUI.
+
+        Providers are only registered here; they are imported and created on
+        first use or by ``warm_up``.
+        """
         self.google_api_key = google_api_key
         self.murf_api_key = murf_api_key
         self.tts_provider = tts_provider
         self.user_preferences["murf_voice_id"] = murf_voice_id
 
-        try:
-            genai.configure(api_key=self.google_api_key)
-            self.gemini_model = genai.GenerativeModel("gemini-1.5-flash")
-            self.log_status("Gemini AI configured successfully.")
-        except Exception as e:
-            self.log_status(f"Error configuring Gemini: {e}")
-            return False
+        self.providers.register("gemini", lambda: create_gemini_model(google_api_key))
+        self.analysis_cache.clear()
+        self.prefetch_cache.clear()
+        self.default_session.clear()
 
         if self.tts_provider == "murf" and self.murf_api_key:
-            try:
-                self.murf_client = Murf(api_key=self.murf_api_key)
-                self.log_status("Murf AI TTS configured successfully.")
-            except Exception as e:
-                self.log_status(
-                    f"Error configuring Murf AI: {e}. Falling back to pyttsx3."
-                )
-                self.tts_provider = "pyttsx3"
-                self.setup_pyttsx3()
-        else:
-            self.setup_pyttsx3()
+            self.providers.register(
+                "murf_client", lambda: create_murf_client(murf_api_key)
+            )
+            self.providers.register("murf", self._create_murf_synth)
+        elif self.tts_provider == "murf":
+            self.tts_provider = "pyttsx3"
+        self.log_status("Settings applied.")
         return True
 
     def setup_pyttsx3(self):
-        """Configure pyttsx3 text-to-speech."""
-        try:
-            self.tts_engine = pyttsx3.init()
-            voices = self.tts_engine.getProperty("voices")
-            if voices:
-                self.tts_engine.setProperty("voice", voices[0].id)
-            self.tts_engine.setProperty("rate", 160)
-            self.tts_engine.setProperty("volume", 0.9)
-            self.log_status("pyttsx3 TTS configured successfully.")
-        except Exception as e:
-            self.log_status(f"Error configuring pyttsx3: {e}")
-
-    # Splitting long texts into smaller chunks for Murf ie. less than 300 characters
-    def chunk_text_for_murf(self, text: str, max_chars: int = 2800) -> list:
-        if len(text) <= max_chars:
-            return [text]
-        chunks, sentences = [], text.split(". ")
-        current_chunk = ""
-        for sentence in sentences:
-            sentence_with_period = sentence + (
-                ". " if not sentence.endswith(".") else " "
+        """Register the pyttsx3 worker. It is started once and kept across
+        ``configure`` calls, also as the fallback when Murf fails."""
+        self.providers.register(
+            "pyttsx3", lambda: create_local_speech(metrics=self.metrics, log=self.log_status)
+        )
+
+    def _create_murf_synth(self):
+        from murf_synth import MurfSynthesizer
+
+        if self.tts_cache is None:
+            self.tts_cache = AudioCache(
+                self.user_preferences["tts_cache_dir"],
+                self.user_preferences["tts_cache_max_mb"] * 1024 * 1024,
             )
-            if len(current_chunk + sentence_with_period) <= max_chars:
-                current_chunk += sentence_with_period
-            else:
-                if current_chunk:
-                    chunks.append(current_chunk.strip())
-                current_chunk = sentence_with_period
-        if current_chunk:
-            chunks.append(current_chunk.strip())
-        return chunks
-
-    def generate_murf_speech(self, text: str):
+        synth = MurfSynthesizer(
+            self.providers.get("murf_client"),
+            cache=self.tts_cache,
+            metrics=self.metrics,
+            caller=self.create_caller("murf", "tts_deadline_s"),
+        )
+        self.log_status("Murf AI TTS configured successfully.")
+        return synth
+
+    def warm_up(self):
+        """Load the configured LLM and TTS providers in the background."""
+        names = ["capture", "gemini", "pyttsx3"]
+        if self.tts_provider == "murf":
+            names += ["murf", "player"]
+        self.log_status("Loading AI providers in the background...")
+        return self.providers.warm_up(names, on_done=lambda: self.log_status("Ready."))
+
+    def shutdown(self):
+        """Stop all work and release every loaded provider."""
+        self.stop_watching()
+        self.stop_prefetching()
+        self.foreground.stop()
+        self.stop_speaking()
+        self.engine.shutdown()
+        self.gemini_caller.close()
+        audio = self.providers.peek("audio")
+        self.providers.close_all()
+        if audio is not None:
+            audio.mixer.quit()
+
+    def setup_preprocessor(self):
+        """Build the image preprocessor from the current user preferences."""
+        prefs = self.user_preferences
+        self.preprocessor = ImagePreprocessor(
+            max_pixels=prefs["image_max_pixels"],
+            image_format=prefs["image_format"],
+            quality=prefs["image_quality"],
+            grayscale=prefs["image_grayscale"],
+            strip_taskbar=prefs["image_strip_taskbar"],
+            taskbar_px=prefs["image_taskbar_px"],
+        )
+
+    def create_caller(self, name: str, deadline_key: str) -> ResilientCaller:
+        """Deadline, retry and circuit-breaker wrapper for one remote service."""
+        prefs = self.user_preferences
+        return ResilientCaller(
+            name,
+            deadline=prefs[deadline_key],
+            hedge_quantile=0.95 if prefs["hedge_requests"] else None,
+            metrics=self.metrics,
+        )
+
+    def generate_text(self, contents, token=None) -> str:
+        """Non-streaming Gemini request bounded by the LLM deadline."""
+        model = self.gemini_model
+        timeout = self.user_preferences["llm_deadline_s"]
+
+        def request():
+            return model.generate_content(
+                contents, request_options={"timeout": timeout}
+            ).text
+
+        return self.gemini_caller.call(request, token=token)
+
+    def chunk_text_for_murf(
+        self, text: str, max_chars: int = MAX_CHUNK_CHARS, first_chars: int = FIRST_CHUNK_CHARS
+    ) -> list:
+        """Split text into Murf requests: a short first chunk, then larger ones."""
+        return list(
+            chunk_sentences(
+                iter_sentences(text, max_chars), first_chars=first_chars, max_chars=max_chars
+            )
+        )
+
+    def generate_murf_speech(
+        self, text: str, unspoken: list = None, first_chars: int = FIRST_CHUNK_CHARS
+    ):
+        """Yield the audio for each chunk of ``text`` in order.
+
+        Chunks are synthesized concurrently, so the first one can play while
+        the rest are still being generated. If ``unspoken`` is given, a failed
+        chunk ends the generator and it and the chunks after it are added to
+        the list instead of raising, so the caller can speak them another way.
+        ``first_chars`` caps the first chunk; text that continues a response
+        already playing needs no short first chunk.
+        """
+        text_chunks = self.chunk_text_for_murf(text, first_chars=first_chars)
+        self.log_status(f"Generating {len(text_chunks)} audio chunk(s) from Murf...")
+        audio_chunks = self.murf_synth.synthesize_all(
+            text_chunks,
+            self.user_preferences["murf_voice_id"],
+            self.user_preferences["murf_style"],
+            stream_first=True,
+        )
+        ready = 0
         try:
-            text_chunks = self.chunk_text_for_murf(text)
-            audio_chunks = []
+            for audio_data in audio_chunks:
+                ready += 1
+                self.log_status(f"Audio chunk {ready}/{len(text_chunks)} ready.")
+                yield audio_data
+        except Exception as e:
+            self.log_status(f"MURF TTS Error: {e}")
+            if unspoken is None:
+                raise e
+            unspoken.extend(text_chunks[ready:])
+        finally:
+            audio_chunks.close()
+            stats = self.tts_cache.stats()
             self.log_status(
-                f"Generating {len(text_chunks)} audio chunk(s) from Murf..."
+                f"TTS cache: {stats['hits']} hits, {stats['misses']} misses."
             )
-            for i, chunk in enumerate(text_chunks):
-                self.log_status(f"Processing chunk {i + 1}/{len(text_chunks)}...")
-                response = self.murf_client.text_to_speech.generate(
-                    text=chunk, voice_id=self.user_preferences["murf_voice_id"]
-                )
-                if hasattr(response, "audio_file"):
-                    audio_response = requests.get(response.audio_file)
-                    audio_chunks.append(audio_response.content)
-                if i < len(text_chunks) - 1:
-                    time.sleep(0.5)
-            return audio_chunks
+
+    def play_audio_from_bytes(self, audio_chunks, token=None):
+        """Play audio chunks back to back as the iterable produces them."""
+        started = time.perf_counter()
+        try:
+            player = self.providers.get("player")
         except Exception as e:
-            self.log_status(f"MURF TTS Error: {e}")
-            raise e
+            self.log_status(f"Error initializing pygame mixer: {e}. Murf TTS may not work.")
+            return
+
+        def on_start():
+            self.metrics.record("playback_start", time.perf_counter() - started)
+            self.log_status("Playing audio...")
 
-    def play_audio_from_bytes(self, audio_data_list):
         try:
-            for i, audio_data in enumerate(audio_data_list):
-                if not self.is_reading:
-                    break
-                self.log_status(
-                    f"Playing audio chunk {i + 1}/{len(audio_data_list)}..."
-                )
-                audio_buffer = io.BytesIO(audio_data)
-                pygame.mixer.music.load(audio_buffer)
-                pygame.mixer.music.play()
-                while pygame.mixer.music.get_busy() and self.is_reading:
-                    time.sleep(0.1)
+            # on_start runs on the playback thread; give it the caller's context
+            context = contextvars.copy_context()
+            player.play(audio_chunks, token, on_start=lambda: context.run(on_start))
         except Exception as e:
             self.log_status(f"Audio playback error: {e}")
 
-    def capture_active_window(self) -> Image.Image:
+    def capture_active_window(self, hwnd=None) -> Image.Image:
         try:
-            hwnd = win32gui.GetForegroundWindow()
-            x, y, right, bottom = win32gui.GetWindowRect(hwnd)
-            width, height = right - x, bottom - y
-            hwndDC = win32gui.GetWindowDC(hwnd)
-            mfcDC = win32ui.CreateDCFromHandle(hwndDC)
-            saveDC = mfcDC.CreateCompatibleDC()
-            saveBitMap = win32ui.CreateBitmap()
-            saveBitMap.CreateCompatibleBitmap(mfcDC, width, height)
-            saveDC.SelectObject(saveBitMap)
-            saveDC.BitBlt((0, 0), (width, height), mfcDC, (0, 0), win32con.SRCCOPY)
-            bmpstr = saveBitMap.GetBitmapBits(True)
-            im = Image.frombuffer("RGB", (width, height), bmpstr, "raw", "BGRX", 0, 1)
-            win32gui.DeleteObject(saveBitMap.GetHandle())
-            saveDC.DeleteDC()
-            mfcDC.DeleteDC()
-            win32gui.ReleaseDC(hwnd, hwndDC)
-            return im
+            with self.capture_lock:
+                with self.metrics.span("capture"):
+                    image = self.capture_backend.grab_window(hwnd).to_image()
+                return image
         except Exception as e:
             self.log_status(f"Error capturing active window: {e}")
-            return pyautogui.screenshot()
+            return self.capture_screen()
+
+    def list_monitors(self, max_age_s: float = 10.0) -> list:
+        """The attached monitors, re-enumerated at most every ``max_age_s``."""
+        if self.monitors is None or time.monotonic() - self.monitors_listed_at > max_age_s:
+            self.monitors = self.capture_backend.monitors()
+            self.monitors_listed_at = time.monotonic()
+        return self.monitors
+
+    def capture_targets(self):
+        """The (label, box) pairs a screen capture covers per ``capture_target``:
+        "primary", "all", "monitor:<n>" or "region:<name>" (a box from
+        ``capture_regions``). Returns None for the primary monitor."""
+        prefs = self.user_preferences
+        kind, _, name = prefs["capture_target"].partition(":")
+        if kind == "region":
+            box = prefs["capture_regions"].get(name)
+            if box:
+                return [(name, tuple(box))]
+            self.log_status(f"Unknown capture region {name!r}, capturing the primary monitor.")
+        elif kind == "all":
+            monitors = self.list_monitors()
+            if len(monitors) > 1:
+                return [(m.name.capitalize(), m.box) for m in monitors]
+        elif kind == "monitor":
+            for monitor in self.list_monitors():
+                if str(monitor.index) == name:
+                    return [(monitor.name.capitalize(), monitor.box)]
+            self.log_status(f"Monitor {name} is not connected, capturing the primary monitor.")
+        return None
+
+    def capture_screen(self) -> Image.Image:
+        """Capture the configured target. Several monitors are grabbed in
+        parallel and stitched into one image that remembers their layout."""
+        targets = self.capture_targets()
+        with self.capture_lock:
+            with self.metrics.span("capture"):
+                if targets is None:
+                    image = self.capture_backend.grab_screen().to_image()
+                    image.info["work_area"] = self.screen_work_area(image)
+                elif len(targets) == 1:
+                    image = self.capture_backend.grab_region(targets[0][1]).to_image()
+                else:
+                    labels, boxes = zip(*targets)
+                    images = self.providers.get("parallel_capture").grab(boxes)
+                    image = stitch(images, boxes, labels)
+            if targets is None:
+                origin = (0, 0)
+            else:
+                origin = (min(b[0] for _, b in targets), min(b[1] for _, b in targets))
+            image.info["own_windows"] = self.own_window_boxes(origin)
+            if targets is not None:
+                image.info["target"] = self.user_preferences["capture_target"]
+            self.record_history(image)
+            return image
+
+    def own_window_boxes(self, origin) -> list:
+        """Where the agent's own windows are on a capture whose top-left
+        corner is at ``origin`` on the virtual screen."""
+        try:
+            boxes = self.capture_backend.own_window_boxes()
+        except Exception:
+            return []
+        return [
+            (left - origin[0], top - origin[1], right - origin[0], bottom - origin[1])
+            for left, top, right, bottom in boxes
+        ]
+
+    def without_own_windows(self, image: Image.Image) -> Image.Image:
+        """A screen capture with the agent's own windows blacked out.
+
+        The agent's transcript, question box and status bar change with every
+        exchange; left in, they would give each capture a new content hash,
+        so follow-ups and cached analyses would never match the screen.
+        """
+        masked = image
+        for left, top, right, bottom in image.info.get("own_windows", ()):
+            box = (max(0, left), max(0, top), min(image.width, right), min(image.height, bottom))
+            if box[0] < box[2] and box[1] < box[3]:
+                if masked is image:
+                    masked = image.copy()
+                masked.paste((0, 0, 0), box)
+        return masked
+
+    def screen_work_area(self, image: Image.Image):
+        """The part of a primary-monitor capture the taskbar leaves free, so
+        the preprocessor can trim the taskbar and nothing else."""
+        try:
+            work_area = self.capture_backend.work_area()
+        except Exception:
+            work_area = None
+        return work_area or (0, 0, image.width, image.height)
+
+    def frame_key(self, image: Image.Image) -> str:
+        """The key analyses and follow-ups of a capture are stored under."""
+        return content_hash(self.without_own_windows(image))
+
+    def prepare_images(self, image: Image.Image) -> list:
+        """Preprocess a capture into the image parts of a Gemini request.
+
+        With ``monitor_layout`` set to "separate", each monitor of a stitched
+        capture is sent as its own labelled image, so every monitor keeps its
+        own resolution budget instead of sharing one across the canvas.
+        """
+        parts = image.info.get("parts")
+        with self.metrics.span("preprocess"):
+            if not parts or self.user_preferences["monitor_layout"] != "separate":
+                # Only a full-screen capture carries a work area; windows,
+                # regions and crops are never trimmed
+                work_area = image.info.get("work_area")
+                payloads = [(None, self.preprocessor.process(image, work_area))]
+            else:
+                payloads = [
+                    (label, self.preprocessor.process(image.crop(box))) for label, box in parts
+                ]
+        self.log_status(f"Uploading {', '.join(p.summary() for _, p in payloads)}...")
+        contents = []
+        for label, payload in payloads:
+            if label:
+                contents.append(f"{label}:")
+            contents.append(payload.as_blob())
+        return contents
+
+    @property
+    def history(self) -> FrameHistory:
+        """The frame history of the configured capture target."""
+        return self.histories.get(self.user_preferences["capture_target"])
+
+    def record_history(self, image: Image.Image):
+        """Keep a compressed copy of a screen capture in its target's history.
+
+        Each capture target has its own history, so "what changed?" always
+        compares like with like, and switching targets and back keeps the
+        earlier frames. The agent's own windows are left out, since they
+        change with every exchange.
+        """
+        target = image.info.get("target", "primary")
+        try:
+            with self.metrics.span("history"):
+                self.histories.add(target, self.without_own_windows(image))
+        except Exception as e:
+            self.log_status(f"Could not record frame history: {e}")
+
+    def describe_history(self, seconds_ago: float = None, token=None):
+        """Tell the user what changed on screen over the last ``seconds_ago``."""
+        token = token or CancelToken()
+        seconds_ago = seconds_ago or self.user_preferences["history_compare_s"]
+        captured_at = time.time()
+        current_image = self.capture_screen()
+        history = self.histories.get(current_image.info.get("target", "primary"))
+        current = history.newest
+        if current is None or current.timestamp < captured_at:
+            self.log_status("Error: could not record the screen, so there is nothing to compare.")
+            return
+        then = history.frame_at(time.time() - seconds_ago, current.size)
+        token.raise_if_cancelled()
+        self.log_response("user", "What changed on screen?")
+        if then is current:
+            answer = "I have no earlier view of the screen yet. Read it or start watching first."
+        else:
+            tiles = history.changed_tiles(then, current)
+            elapsed = current.timestamp - then.timestamp
+            if not tiles:
+                answer = f"Nothing has changed on screen in the last {elapsed:.0f} seconds."
+            else:
+                answer = self.compare_frames(
+                    history.reconstruct(then), current_image, current, tiles, elapsed, token
+                )
+        if answer:
+            self.log_response("assistant", answer)
+            self.speak_text(answer, token)
+
+    def compare_frames(self, before, after, frame, tiles, elapsed, token=None):
+        """Ask Gemini to describe the differences inside the changed regions."""
+        if not self.gemini_model:
+            return "AI model is not configured. Please check your API key in settings."
+        regions = changed_regions(frame, tiles)[: self.user_preferences["history_max_regions"]]
+        self.log_status(f"Comparing {len(regions)} changed region(s) with {elapsed:.0f}s ago...")
+        contents = [
+            f"{self.system_prompt}\n\nEach pair of images below shows one region of the "
+            f"screen {elapsed:.0f} seconds ago and now. In a few short sentences, tell "
+            "the user what changed."
+        ]
+        try:
+            with self.metrics.span("preprocess"):
+                for box in regions:
+                    contents += [
+                        "Before:",
+                        self.preprocessor.process(before.crop(box)).as_blob(),
+                        "Now:",
+                        self.preprocessor.process(after.crop(box)).as_blob(),
+                    ]
+            with self.metrics.span("analyze_history"):
+                return self.generate_text(contents, token)
+        except JobCancelled:
+            raise
+        except Exception as e:
+            self.log_status(f"Gemini Vision Error: {e}")
+            return f"An error occurred during AI analysis: {e}"
+
+    def submit_history(self, seconds_ago: float = None):
+        self.make_room_for_interactive()
+        job = self.engine.submit(
+            "what-changed",
+            self.describe_history,
+            seconds_ago,
+            priority=PRIORITY_INTERACTIVE,
+            key=("history", seconds_ago),
+        )
+        if job is None:
+            self.log_status("Busy: too many pending requests. Please wait.")
+        return job
 
     def analyze_screen_with_vision_llm(
-        self, image: Image.Image, user_query: str = None
+        self, image: Image.Image, user_query: str = None, on_text=None, token=None
     ) -> str:
+        """Analyze a screenshot. When ``on_text`` is given, the response is
+        streamed and each fragment is passed to it as soon as it arrives."""
         if not self.gemini_model:
             self.log_status("Error: Gemini model not configured.")
             return "AI model is not configured. Please check your API key in settings."
         try:
+            key = self.frame_key(image)
+            cached = self.analysis_cache.get(key, user_query)
+            if cached is not None:
+                self.log_status("Screen unchanged, reusing previous analysis.")
+                if on_text:
+                    on_text(cached)
+                # The exchange is already in the history; only make sure
+                # follow-ups know which screen is being discussed
+                if not user_query and not self.session.has_frame(key):
+                    self.session.record_frame(key, cached)
+                return cached
+
+            if user_query and self.session.has_frame(key):
+                answer = self.answer_follow_up(user_query, token)
+                if answer is not None:
+                    self.analysis_cache.put(key, user_query, answer)
+                    if on_text:
+                        on_text(answer)
+                    self.remember_answer(key, user_query, answer)
+                    return answer
+
             self.log_status("Analyzing screen with Gemini Vision...")
-            prompt_text = f"{self.system_prompt}\n\n"
-            if user_query:
-                prompt_text += f'Analyze this screen image and answer the user\'s question: "{user_query}"'
-            else:
-                prompt_text += "Analyze this screen image and provide an intelligent summary of its content and interactive elements."
+            prompt_text = build_analysis_prompt(
+                self.system_prompt, user_query, self.session.history_text()
+            )
 
-            contents = [prompt_text, image]
-            response = self.gemini_model.generate_content(contents)
-            analysis = response.text
+            contents = [prompt_text] + self.prepare_images(image)
+            if token is not None:
+                token.raise_if_cancelled()
+            started = time.perf_counter()
+            if on_text is None:
+                analysis = self.generate_text(contents, token)
+            else:
+                # Retries and hedging only cover the wait for the first chunk;
+                # a stream that was already read aloud is not restarted.
+                deadline = self.user_preferences["llm_deadline_s"]
+                response = self.gemini_caller.call(
+                    self.gemini_model.generate_content,
+                    contents,
+                    stream=True,
+                    request_options={"timeout": deadline},
+                    token=token,
+                    hedge=False,
+                )
+                fragments = []
+                for chunk in response:
+                    if token is not None:
+                        token.raise_if_cancelled()
+                    if time.perf_counter() - started > deadline:
+                        raise TimeoutError("Gemini response took too long.")
+                    if not fragments:
+                        self.metrics.record(
+                            "analyze_first_token", time.perf_counter() - started
+                        )
+                    fragments.append(chunk.text)
+                    on_text(chunk.text)
+                analysis = "".join(fragments)
+            self.metrics.record("analyze", time.perf_counter() - started)
+            self.analysis_cache.put(key, user_query, analysis)
+            self.remember_answer(key, user_query, analysis)
             self.log_status("AI analysis complete.")
             return analysis
+        except JobCancelled:
+            raise
         except Exception as e:
             self.log_status(f"Gemini Vision Error: {e}")
             return f"An error occurred during AI analysis: {e}"
 
-    def speak_text(self, text: str):
-        if not text or self.is_reading:
-            return
-        self.is_reading = True
+    def answer_follow_up(self, question: str, token=None):
+        """Answer from the previous analysis with a text-only request.
+
+        Returns None when the model needs to see the screen again.
+        """
+        self.log_status("Same screen as before, answering without re-uploading it...")
+        prompt_text = self.session.follow_up_prompt(self.system_prompt, question)
+        with self.metrics.span("follow_up"):
+            answer = self.generate_text(prompt_text, token)
+        if token is not None:
+            token.raise_if_cancelled()
+        if NEED_SCREEN in answer:
+            self.log_status("Follow-up needs the screen itself, uploading it...")
+            return None
+        self.log_status("AI analysis complete.")
+        return answer
+
+    def remember_answer(self, frame_key: str, query: str, answer: str):
+        """Record the exchange and what is known about the current frame."""
+        if self.session.has_frame(frame_key):
+            if query:
+                self.session.add_frame_detail(frame_key, answer)
+        else:
+            self.session.record_frame(frame_key, answer)
+        self.session.add_turn("user", query or "Describe the screen.")
+        self.session.add_turn("assistant", answer)
+
+    def summarize_conversation(self, text: str) -> str:
+        prompt_text = (
+            "Summarize this conversation between a user and a screen reading "
+            f"assistant in under 80 words, keeping any facts about the screen:\n{text}"
+        )
+        return self.generate_text(prompt_text)
+
+    def describe_screen_changes(self, regions: list, context: str = "", token=None) -> str:
+        """Describe what is new in the given changed screen regions."""
+        token = token or CancelToken()
+        if not self.gemini_model:
+            return None
         try:
-            speech_text = re.sub(r"[\*#]+", "", text)
-            if self.tts_provider == "murf" and self.murf_client:
-                self.log_status("Generating speech with Murf AI...")
-                audio_data = self.generate_murf_speech(speech_text)
-                self.play_audio_from_bytes(audio_data)
-            elif self.tts_engine:
-                self.log_status("Generating speech with pyttsx3...")
-                self.tts_engine.say(speech_text)
-                self.tts_engine.runAndWait()
-            else:
-                self.log_status("No TTS provider is configured.")
+            self.log_status(
+                f"Screen changed, analyzing {len(regions)} changed region(s)..."
+            )
+            prompt_text = (
+                f"{self.system_prompt}\n\n"
+                "The attached images are only the parts of the screen that just changed. "
+            )
+            if context:
+                prompt_text += f'Earlier you told the user: "{context}" '
+            prompt_text += (
+                "In one or two short sentences, tell the user what is new, such as a "
+                "notification, an error dialog or updated numbers. If nothing "
+                "meaningful changed, reply with exactly NO_CHANGE."
+            )
+            contents = [prompt_text]
+            with self.metrics.span("preprocess"):
+                for region in regions:
+                    contents.append(self.preprocessor.process(region).as_blob())
+            token.raise_if_cancelled()
+            with self.metrics.span("analyze_changes"):
+                description = self.generate_text(contents, token)
+            self.log_status("Ready.")
+            return description
+        except JobCancelled:
+            raise
         except Exception as e:
-            self.log_status(f"TTS Error: {e}")
+            self.log_status(f"Gemini Vision Error: {e}")
+            return None
+
+    def prefetch_analysis(self, image: Image.Image, token=None) -> str:
+        """Quietly analyze a window nobody asked about yet, for ``WindowPrefetcher``.
+
+        The conversation history is left out of the prompt and the result is
+        not added to it, since the user may never hear it.
+        """
+        if not self.gemini_model:
+            return None
+        try:
+            with self.metrics.span("preprocess"):
+                payload = self.preprocessor.process(image)
+            contents = [build_analysis_prompt(self.system_prompt), payload.as_blob()]
+            with self.metrics.span("prefetch"):
+                return self.generate_text(contents, token)
+        except JobCancelled:
+            raise
+        except Exception as e:
+            self.log_status(f"Prefetch error: {e}")
+            return None
+
+    def start_prefetching(self):
+        if self.prefetcher is None or not self.prefetcher.running:
+            prefs = self.user_preferences
+            self.prefetcher = WindowPrefetcher(
+                self,
+                self.prefetch_cache,
+                stable_s=prefs["prefetch_stable_s"],
+                max_calls_per_minute=prefs["prefetch_max_calls_per_minute"],
+            )
+            self.prefetcher.start()
+
+    def stop_prefetching(self):
+        if self.prefetcher and self.prefetcher.running:
+            self.prefetcher.stop()
+
+    def make_room_for_interactive(self):
+        """Cancel prefetches so a request the user is waiting for gets a worker
+        straight away; the prefetcher tries the window again later."""
+        self.engine.cancel_all(priority=PRIORITY_PREFETCH)
+
+    def start_watching(self):
+        if self.watcher is None or not self.watcher.running:
+            self.watcher = ScreenWatcher(
+                self,
+                fps=self.user_preferences["watch_fps"],
+                max_calls_per_minute=self.user_preferences[
+                    "watch_max_calls_per_minute"
+                ],
+            )
+            self.watcher.start()
+
+    def stop_watching(self):
+        if self.watcher and self.watcher.running:
+            self.watcher.stop()
+
+    def speak_text(self, text: str, token=None, priority=PRIORITY_INTERACTIVE):
+        if not text:
+            return
+        token = token or CancelToken()
+        self._preempt(priority)
+        with self.speech_lock:
+            if token.cancelled:
+                return
+            self.active_token, self.active_priority = token, priority
+            try:
+                self._speak_now(text, token, priority)
+            except Exception as e:
+                self.log_status(f"TTS Error: {e}")
+            finally:
+                self.active_token = self.active_priority = None
+                self.log_status("Ready.")
+
+    def speak_narration(self, text: str, token=None):
+        """Speak watch-mode narration, which any interactive speech interrupts."""
+        self.speak_text(text, token, priority=PRIORITY_BACKGROUND)
+
+    def _preempt(self, priority):
+        """Cancel speech in progress if it is less urgent than ``priority``."""
+        token, active_priority = self.active_token, self.active_priority
+        if token is not None and active_priority is not None and priority < active_priority:
+            self.log_status("Interrupting background narration...")
+            token.cancel()
+
+    def speak_sentences(self, sentences: queue.Queue, token, max_chars: int = MAX_CHUNK_CHARS):
+        """Speak sentences from a queue until a ``None`` sentinel arrives.
+
+        The first sentence is spoken on its own, so it comes back quickly, and
+        the rest are packed into chunks that double in size, so they need few
+        round trips. Chunk boundaries depend only on the text, never on how fast
+        the stream arrives, so a replayed response hits the audio cache.
+        """
+        self._preempt(PRIORITY_INTERACTIVE)
+        with self.speech_lock:
+            self.active_token, self.active_priority = token, PRIORITY_INTERACTIVE
+            try:
+                chunks = chunk_sentences(
+                    iter(sentences.get, None),
+                    first_chars=FIRST_CHUNK_CHARS,
+                    max_chars=max_chars,
+                    eager_first=True,
+                )
+                for chunk in chunks:
+                    if token.cancelled:
+                        break
+                    # Already chunked, so _speak_now must not split it again
+                    self._speak_now(chunk, token, first_chars=max_chars)
+            except Exception as e:
+                self.log_status(f"TTS Error: {e}")
+            finally:
+                self.active_token = self.active_priority = None
+                self.log_status("Ready.")
+
+    def _speak_now(
+        self, text: str, token, priority=PRIORITY_INTERACTIVE, first_chars=FIRST_CHUNK_CHARS
+    ):
+        speech_text = clean_for_speech(text)
+        if self.tts_provider == "murf" and self.murf_synth:
+            if self.murf_synth.available:
+                self.log_status("Generating speech with Murf AI...")
+                unspoken = []
+                audio_chunks = self.generate_murf_speech(speech_text, unspoken, first_chars)
+                try:
+                    self.play_audio_from_bytes(audio_chunks, token)
+                finally:
+                    audio_chunks.close()
+                if not unspoken or token.cancelled:
+                    return
+                speech_text = " ".join(unspoken)
+            self.log_status("Murf AI is unavailable, speaking with pyttsx3...")
+        self._speak_pyttsx3(speech_text, token, priority)
+
+    def _speak_pyttsx3(self, speech_text: str, token, priority=PRIORITY_INTERACTIVE):
+        """Queue the text sentence by sentence on the pyttsx3 worker and wait."""
+        worker = self.tts_engine
+        if not worker:
+            self.log_status("No TTS provider is configured.")
+            return
+        if not worker.ready.is_set():
+            self.log_status("Starting pyttsx3...")
+        self.log_status("Speaking with pyttsx3...")
+        token.on_cancel(worker.stop)
+        try:
+            # A token cancelled before now has already run worker.stop, so
+            # nothing may be queued after it
+            utterances = []
+            for sentence in iter_sentences(speech_text):
+                if token.cancelled:
+                    return
+                utterances.append(worker.speak(sentence, priority))
+            if token.cancelled:
+                worker.stop()  # Cancelled while the sentences were being queued
+                return
+            for utterance in utterances:
+                utterance.wait()
         finally:
-            self.is_reading = False
-            self.log_status("Ready.")
+            token.remove_callback(worker.stop)
 
     def stop_speaking(self):
-        if not self.is_reading:
+        """Cancel every queued and running job, including in-flight Gemini streams."""
+        reading = self.is_reading
+        # Questions still waiting in the batcher do not count as reading, so
+        # they are dropped whether or not anything is being read yet
+        self.question_batcher.clear()
+        self.engine.cancel_all()
+        if not reading:
             return
         self.log_status("Stopping speech...")
-        self.is_reading = False
-        if self.tts_provider == "murf":
-            pygame.mixer.music.stop()
-        if self.tts_engine and self.tts_engine._inLoop:
-            self.tts_engine.stop()
-        if self.reading_thread and self.reading_thread.is_alive():
-            # This is a bit abrupt, but necessary to stop pyttsx3's loop
-            # A more graceful solution would involve setting a flag that the thread checks
-            pass
+        token = self.active_token
+        if token:
+            token.cancel()
         self.log_status("Speech stopped.")
 
-    def smart_read_screen(self, capture_mode="screen", query=None):
-        if self.is_reading:
-            self.log_status("Already reading. Please wait or stop the current speech.")
-            return
-
-        self.log_status(f"Capturing {capture_mode}...")
-        image = (
-            self.capture_active_window()
-            if capture_mode == "window"
-            else pyautogui.screenshot()
+    def submit_read(self, capture_mode="screen", query=None):
+        """Queue a read on the engine; duplicate rapid requests share one job."""
+        self.make_room_for_interactive()
+        job = self.engine.submit(
+            f"read-{capture_mode}",
+            self.smart_read_screen,
+            capture_mode,
+            query,
+            priority=PRIORITY_INTERACTIVE,
+            key=("read", capture_mode, query),
         )
+        if job is None:
+            self.log_status("Busy: too many pending requests. Please wait.")
+        return job
+
+    def ask_question(self, question: str):
+        """Queue a question about the screen; questions asked in quick
+        succession are answered together from one capture."""
+        self.question_batcher.add(question)
+
+    def submit_questions(self, questions: list):
+        """Dispatch a batch from the question batcher as one engine job."""
+        self.make_room_for_interactive()
+        if len(questions) == 1:
+            job = self.engine.submit(
+                "ask",
+                self.smart_read_screen,
+                self.session.capture_mode,
+                questions[0],
+                priority=PRIORITY_INTERACTIVE,
+            )
+        else:
+            job = self.engine.submit(
+                "ask-batch", self.answer_questions, questions, priority=PRIORITY_INTERACTIVE
+            )
+        if job is None:
+            self.log_status("Busy: too many pending requests. Please wait.")
+            self.question_batcher.done()
+        else:
+            job.add_done_callback(lambda job: self.question_batcher.done())
+        return job
+
+    def answer_questions(self, questions: list, token=None):
+        """Answer several questions about one capture with a single request.
+
+        The answers are logged and spoken in the order they were asked. A
+        question the combined reply does not answer is asked again on its own.
+        """
+        token = token or CancelToken()
+        self.log_status(f"Capturing {self.session.capture_mode}...")
+        if self.session.capture_mode == "window":
+            image = self.capture_active_window(self.foreground.current())
+        else:
+            image = self.capture_screen()
+        token.raise_if_cancelled()
+        for question in questions:
+            self.log_response("user", question)
+
+        key = self.frame_key(image)
+        answers = [self.analysis_cache.get(key, q) for q in questions]
+        missing = [i for i, answer in enumerate(answers) if answer is None]
+        if len(missing) > 1 and self.gemini_model:
+            asked = [questions[i] for i in missing]
+            self.log_status(f"Answering {len(asked)} questions in one request...")
+            try:
+                prompt_text = build_batch_prompt(
+                    self.system_prompt, asked, self.session.history_text()
+                )
+                contents = [prompt_text] + self.prepare_images(image)
+                with self.metrics.span("analyze_batch"):
+                    reply = self.generate_text(contents, token)
+                for i, answer in zip(missing, split_batch_answers(reply, len(asked))):
+                    if answer is not None:
+                        answers[i] = answer
+                        self.analysis_cache.put(key, questions[i], answer)
+                        self.remember_answer(key, questions[i], answer)
+            except JobCancelled:
+                raise
+            except Exception as e:
+                self.log_status(f"Gemini Vision Error: {e}")
+
+        for i, question in enumerate(questions):
+            token.raise_if_cancelled()
+            if answers[i] is None:
+                answers[i] = self.analyze_screen_with_vision_llm(image, question, token=token)
+            self.log_response("assistant", answers[i])
+        for answer in answers:
+            if token.cancelled:
+                break
+            self.speak_text(answer, token)
+
+    def smart_read_screen(self, capture_mode="screen", query=None, token=None):
+        token = token or CancelToken()
+        self.log_status(f"Capturing {capture_mode}...")
+        if capture_mode == "window":
+            # Not simply the foreground window: clicking "Read Active Window"
+            # gives the agent itself the focus
+            hwnd = self.foreground.current()
+            image = self.capture_active_window(hwnd)
+            if hwnd is not None and not query:
+                self.use_prefetched(hwnd, image)
+        else:
+            image = self.capture_screen()
+        token.raise_if_cancelled()
+        # Questions that follow capture the same thing, so they can match its frame
+        self.session.capture_mode = capture_mode
 
         if query:
             self.log_response("user", query)
 
-        analysis = self.analyze_screen_with_vision_llm(image, query)
+        try:
+            if self.user_preferences["stream_responses"]:
+                self.stream_read(image, query, token)
+                return
+
+            analysis = self.analyze_screen_with_vision_llm(image, query, token=token)
+            token.raise_if_cancelled()
+
+            if analysis:
+                self.log_response("assistant", analysis)
+                self.speak_text(analysis, token)
+        finally:
+            if self.user_preferences["show_metrics_in_status"]:
+                self.log_status(self.metrics.status_summary())
+
+    def use_prefetched(self, hwnd, image: Image.Image):
+        """Seed the analysis cache with a prefetched analysis of this window,
+        if one exists for how it looks now, so the read answers at once."""
+        key = content_hash(image)
+        analysis = self.prefetch_cache.get(hwnd, key)
+        if analysis is not None:
+            self.log_status("Using the analysis prepared while the window had focus.")
+            self.analysis_cache.put(key, None, analysis)
+
+    def export_metrics(self, path: str):
+        """Write stage latency percentiles as JSON, or Prometheus text for .prom files."""
+        self.metrics.export(path)
+        self.log_status(f"Metrics written to {path}.")
+
+    def stream_read(self, image: Image.Image, query=None, token=None):
+        """Analyze with a streamed response, speaking each sentence as it completes."""
+        token = token or CancelToken()
+        sentences = queue.Queue()
+        segmenter = SentenceSegmenter()
+        received = []
+
+        # Run in a copy of this context so status from the speaker is
+        # attributed to the same job (see service.CURRENT_JOB)
+        context = contextvars.copy_context()
+        speaker = threading.Thread(
+            target=context.run, args=(self.speak_sentences, sentences, token)
+        )
+        speaker.daemon = True
+        speaker.start()
+
+        def on_text(fragment):
+            received.append(fragment)
+            for sentence, separator in segmenter.feed_with_breaks(fragment):
+                # Shown with its line break, so lists and headings keep their layout
+                self.log_response_part("assistant", sentence + separator)
+                if sentence:
+                    sentences.put(sentence)
 
-        if analysis:
-            self.log_response("assistant", analysis)
-            self.reading_thread = threading.Thread(
-                target=self.speak_text, args=(analysis,)
+        try:
+            analysis = self.analyze_screen_with_vision_llm(
+                image, query, on_text=on_text, token=token
             )
-            self.reading_thread.daemon = True
-            self.reading_thread.start()
+            if not received and analysis:
+                on_text(analysis)
+            for sentence in segmenter.flush():
+                self.log_response_part("assistant", sentence)
+                sentences.put(sentence)
+        finally:
+            self.log_response_part("assistant", "", done=True)
+            sentences.put(None)
+            speaker.join()
 
 
 class App(ctk.CTk):
@@ -326,7 +1179,7 @@ class App(ctk.CTk):
         super().__init__()
 
         self.title("AI Screen Reader Agent")
-        self.geometry("800x600")
+        self.geometry("920x600")
         ctk.set_appearance_mode("dark")
         ctk.set_default_color_theme("blue")
 
@@ -337,7 +1190,13 @@ class App(ctk.CTk):
         self.agent = AIScreenReaderAgent(
             status_callback=self.queue_status_update,
             response_callback=self.queue_response_update,
+            response_part_callback=self.queue_response_part,
+        )
+        self.transcript = TranscriptBuffer(
+            max_turns=200, archive_path="transcript_archive.jsonl"
         )
+        self.max_updates_per_tick = 500
+        self.turn_counter = 0
 
         self.grid_columnconfigure(0, weight=1)
         self.grid_rowconfigure(1, weight=1)
@@ -345,7 +1204,7 @@ class App(ctk.CTk):
         # --- Top Frame for Controls ---
         self.top_frame = ctk.CTkFrame(self, height=50)
         self.top_frame.grid(row=0, column=0, padx=10, pady=10, sticky="ew")
-        self.top_frame.grid_columnconfigure((0, 1, 2, 3), weight=1)
+        self.top_frame.grid_columnconfigure((0, 1, 2, 3, 4, 5), weight=1)
 
         self.read_screen_button = ctk.CTkButton(
             self.top_frame, text="Read Full Screen", command=self.on_read_screen
@@ -366,10 +1225,20 @@ class App(ctk.CTk):
         )
         self.stop_button.grid(row=0, column=2, padx=5, pady=5)
 
+        self.watch_button = ctk.CTkButton(
+            self.top_frame, text="Start Watching", command=self.on_toggle_watch
+        )
+        self.watch_button.grid(row=0, column=3, padx=5, pady=5)
+
+        self.history_button = ctk.CTkButton(
+            self.top_frame, text="What Changed?", command=self.on_what_changed
+        )
+        self.history_button.grid(row=0, column=4, padx=5, pady=5)
+
         self.settings_button = ctk.CTkButton(
             self.top_frame, text="Settings", command=self.open_settings_window
         )
-        self.settings_button.grid(row=0, column=3, padx=5, pady=5)
+        self.settings_button.grid(row=0, column=5, padx=5, pady=5)
 
         # --- Main Frame for Chat/Response ---
         self.main_frame = ctk.CTkFrame(self)
@@ -382,6 +1251,15 @@ class App(ctk.CTk):
         )
         self.response_textbox.grid(row=0, column=0, padx=10, pady=10, sticky="nsew")
 
+        # Configure tags for styling. CTkTextbox.tag_config forbids fonts,
+        # so the bold role headers are set on the underlying tk.Text.
+        self.response_textbox._textbox.tag_config(
+            "user", foreground="#76A9EA", font=("Arial", 14, "bold")
+        )
+        self.response_textbox._textbox.tag_config(
+            "assistant", foreground="#A3BE8C", font=("Arial", 14, "bold")
+        )
+
         # --- Bottom Frame for User Input ---
         self.bottom_frame = ctk.CTkFrame(self, height=50)
         self.bottom_frame.grid(row=2, column=0, padx=10, pady=10, sticky="ew")
@@ -408,6 +1286,9 @@ class App(ctk.CTk):
         self.settings = self.load_settings()
         self.configure_agent_from_settings()
 
+        # Keep track of the window the user was in before clicking a button
+        self.agent.foreground.start()
+
         # Start processing the queue
         self.process_gui_queue()
 
@@ -416,21 +1297,27 @@ class App(ctk.CTk):
 
     def on_closing(self):
         """Handle application exit."""
-        self.agent.stop_speaking()
-        pygame.mixer.quit()
+        self.agent.shutdown()
         self.destroy()
 
     def process_gui_queue(self):
-        """Process updates from the agent thread safely."""
+        """Drain queued agent updates in one batch with a single widget update."""
+        status = None
+        updates = []
         try:
-            while not self.gui_queue.empty():
+            for _ in range(self.max_updates_per_tick):
                 msg_type, data = self.gui_queue.get_nowait()
                 if msg_type == "status":
-                    self.status_bar.configure(text=data)
-                elif msg_type == "response":
-                    role, content = data
-                    self.update_response_box(role, content)
+                    status = data  # Only the latest status is ever visible
+                else:
+                    updates.append((msg_type, data))
+        except queue.Empty:
+            pass
         finally:
+            if status is not None:
+                self.status_bar.configure(text=status)
+            if updates:
+                self.render_transcript(updates)
             self.after(100, self.process_gui_queue)
 
     def queue_status_update(self, message):
@@ -441,26 +1328,51 @@ class App(ctk.CTk):
         """Queue a response update from another thread."""
         self.gui_queue.put(("response", (role, content)))
 
-    def update_response_box(self, role, content):
-        """Updates the response text box with new content."""
-        self.response_textbox.configure(state="normal")
-        self.response_textbox.insert(
-            tk.END, f"{role.upper()}:\n", (role.lower(), "bold")
-        )
-        self.response_textbox.insert(tk.END, f"{content}\n\n")
-        self.response_textbox.configure(state="disabled")
-        self.response_textbox.see(tk.END)
-
-        # Configure tags for styling
-        self.response_textbox.tag_config(
-            "user", foreground="#76A9EA", font=("Arial", 14, "bold")
-        )
-        self.response_textbox.tag_config(
-            "assistant", foreground="#A3BE8C", font=("Arial", 14, "bold")
-        )
-
-    def run_agent_task(self, target, *args):
-        """Runs an agent method in a separate thread to avoid freezing the GUI."""
+    def queue_response_part(self, role, content, done):
+        """Queue a streamed response fragment from another thread."""
+        self.gui_queue.put(("response_part", (role, content, done)))
+
+    def render_transcript(self, updates):
+        """Apply a batch of transcript updates and page out the oldest turns."""
+        textbox = self.response_textbox
+        textbox.configure(state="normal")
+        for msg_type, data in updates:
+            if msg_type == "response":
+                role, content = data
+                self.mark_turn_start(self.transcript.add(role, content))
+                textbox.insert(tk.END, f"{role.upper()}:\n", (role.lower(), "bold"))
+                textbox.insert(tk.END, f"{content}\n\n")
+            elif msg_type == "response_part":
+                role, content, done = data
+                turn, started = self.transcript.append_part(role, content, done)
+                if turn is None:
+                    continue
+                if started:
+                    self.mark_turn_start(turn)
+                    textbox.insert(
+                        tk.END, f"{role.upper()}:\n", (role.lower(), "bold")
+                    )
+                if content:
+                    textbox.insert(tk.END, content)
+                if done:
+                    textbox.insert(tk.END, "\n\n")
+        paged_out = self.transcript.trim()
+        if paged_out:
+            textbox.delete("1.0", self.transcript.turns[0].mark)
+            for turn in paged_out:
+                textbox.mark_unset(turn.mark)
+        textbox.configure(state="disabled")
+        textbox.see(tk.END)
+
+    def mark_turn_start(self, turn):
+        """Remember where a turn starts so it can be paged out later."""
+        self.turn_counter += 1
+        turn.mark = f"turn{self.turn_counter}"
+        self.response_textbox.mark_set(turn.mark, "end-1c")
+        self.response_textbox.mark_gravity(turn.mark, "left")
+
+    def run_agent_task(self, capture_mode, query=None):
+        """Queues a read on the agent engine so the GUI never blocks."""
         if not self.agent.google_api_key:
             messagebox.showerror(
                 "API Key Missing",
@@ -468,21 +1380,48 @@ class App(ctk.CTk):
             )
             return
 
-        thread = threading.Thread(target=target, args=args)
-        thread.daemon = True
-        thread.start()
+        self.agent.submit_read(capture_mode, query)
 
     def on_read_screen(self):
-        self.run_agent_task(self.agent.smart_read_screen, "screen")
+        self.run_agent_task("screen")
 
     def on_read_window(self):
-        self.run_agent_task(self.agent.smart_read_screen, "window")
+        self.run_agent_task("window")
+
+    def on_what_changed(self):
+        if not self.agent.google_api_key:
+            messagebox.showerror(
+                "API Key Missing",
+                "Please set your Google Gemini API Key in the Settings.",
+            )
+            return
+        self.agent.submit_history()
+
+    def on_toggle_watch(self):
+        if self.agent.watcher and self.agent.watcher.running:
+            self.agent.stop_watching()
+            self.watch_button.configure(text="Start Watching")
+        elif not self.agent.google_api_key:
+            messagebox.showerror(
+                "API Key Missing",
+                "Please set your Google Gemini API Key in the Settings.",
+            )
+        else:
+            self.agent.start_watching()
+            self.watch_button.configure(text="Stop Watching")
 
     def on_ask_question(self, event=None):
         question = self.question_entry.get()
-        if question:
-            self.run_agent_task(self.agent.smart_read_screen, "screen", question)
-            self.question_entry.delete(0, tk.END)
+        if not question:
+            return
+        if not self.agent.google_api_key:
+            messagebox.showerror(
+                "API Key Missing",
+                "Please set your Google Gemini API Key in the Settings.",
+            )
+            return
+        self.agent.ask_question(question)
+        self.question_entry.delete(0, tk.END)
 
     def load_settings(self):
         """Loads settings from a JSON file."""
@@ -496,6 +1435,9 @@ class App(ctk.CTk):
 
     def save_settings(self, settings_to_save):
         """Saves settings to a JSON file."""
+        # Keep the token service.py generated; the dialog does not show it
+        if "service_token" in self.settings:
+            settings_to_save.setdefault("service_token", self.settings["service_token"])
         try:
             with open(self.settings_file, "w") as f:
                 json.dump(settings_to_save, f, indent=4)
@@ -513,9 +1455,24 @@ class App(ctk.CTk):
         murf_key = self.settings.get("murf_api_key", "")
         tts_provider = self.settings.get("tts_provider", "pyttsx3")
         murf_voice = self.settings.get("murf_voice_id", "en-US-natalie")
+        self.agent.user_preferences["show_metrics_in_status"] = self.settings.get(
+            "show_metrics_in_status", False
+        )
+        self.agent.user_preferences["prefetch_windows"] = self.settings.get(
+            "prefetch_windows", False
+        )
+        for key in ("capture_target", "capture_regions", "monitor_layout"):
+            if key in self.settings:
+                self.agent.user_preferences[key] = self.settings[key]
 
         if google_key:
             self.agent.configure(google_key, murf_key, tts_provider, murf_voice)
+            # Load the providers once the window is on screen
+            self.after(100, self.agent.warm_up)
+            if self.agent.user_preferences["prefetch_windows"]:
+                self.agent.start_prefetching()
+            else:
+                self.agent.stop_prefetching()
         else:
             self.status_bar.configure(
                 text="Welcome! Please configure your Google API key in Settings."
@@ -531,10 +1488,11 @@ class SettingsWindow(ctk.CTkToplevel):
     def __init__(self, parent, current_settings, save_callback):
         super().__init__(parent)
         self.title("Settings")
-        self.geometry("500x350")
+        self.geometry("500x540")
         self.transient(parent)  # Keep on top of the main window
 
         self.save_callback = save_callback
+        self.capture_regions = current_settings.get("capture_regions", {})
 
         self.grid_columnconfigure(1, weight=1)
 
@@ -576,11 +1534,56 @@ class SettingsWindow(ctk.CTkToplevel):
             0, current_settings.get("murf_voice_id", "en-US-natalie")
         )
 
+        # Stage timings in the status bar
+        self.show_metrics_var = tk.BooleanVar(
+            value=current_settings.get("show_metrics_in_status", False)
+        )
+        ctk.CTkCheckBox(
+            self, text="Show stage timings in status bar", variable=self.show_metrics_var
+        ).grid(row=4, column=0, columnspan=2, padx=10, pady=10, sticky="w")
+
+        # Speculative analysis of the focused window
+        self.prefetch_var = tk.BooleanVar(
+            value=current_settings.get("prefetch_windows", False)
+        )
+        ctk.CTkCheckBox(
+            self,
+            text="Analyze the active window in the background (uses API calls)",
+            variable=self.prefetch_var,
+        ).grid(row=5, column=0, columnspan=2, padx=10, pady=10, sticky="w")
+
+        # What "Read Full Screen" captures (regions are defined in app_settings.json)
+        targets = ["primary", "all"]
+        try:
+            targets += [f"monitor:{m.index}" for m in parent.agent.list_monitors()]
+        except Exception:
+            pass
+        targets += [f"region:{name}" for name in self.capture_regions]
+        ctk.CTkLabel(self, text="Capture:").grid(
+            row=6, column=0, padx=10, pady=10, sticky="w"
+        )
+        self.capture_target_var = tk.StringVar(
+            value=current_settings.get("capture_target", "primary")
+        )
+        ctk.CTkOptionMenu(
+            self, variable=self.capture_target_var, values=targets
+        ).grid(row=6, column=1, padx=10, pady=10, sticky="w")
+
+        ctk.CTkLabel(self, text="Multiple monitors:").grid(
+            row=7, column=0, padx=10, pady=10, sticky="w"
+        )
+        self.monitor_layout_var = tk.StringVar(
+            value=current_settings.get("monitor_layout", "stitched")
+        )
+        ctk.CTkOptionMenu(
+            self, variable=self.monitor_layout_var, values=["stitched", "separate"]
+        ).grid(row=7, column=1, padx=10, pady=10, sticky="w")
+
         # Save Button
         self.save_button = ctk.CTkButton(
             self, text="Save and Apply", command=self.save_and_close
         )
-        self.save_button.grid(row=4, column=0, columnspan=2, padx=10, pady=20)
+        self.save_button.grid(row=8, column=0, columnspan=2, padx=10, pady=20)
 
     def save_and_close(self):
         new_settings = {
@@ -588,6 +1591,11 @@ class SettingsWindow(ctk.CTkToplevel):
             "murf_api_key": self.murf_key_entry.get().strip(),
             "tts_provider": self.tts_provider_var.get(),
             "murf_voice_id": self.murf_voice_entry.get().strip(),
+            "show_metrics_in_status": self.show_metrics_var.get(),
+            "prefetch_windows": self.prefetch_var.get(),
+            "capture_target": self.capture_target_var.get(),
+            "capture_regions": self.capture_regions,
+            "monitor_layout": self.monitor_layout_var.get(),
         }
         self.save_callback(new_settings)
         self.destroy()
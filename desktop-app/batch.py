@@ -0,0 +1,224 @@
+"""Headless batch analysis of archived screenshots.
+
+Usage::
+
+    python batch.py screenshots/ --output results.jsonl
+    python batch.py archive.tar.gz --output results.jsonl --workers 8 --concurrency 4
+
+Images are streamed from a directory or a tarball. Decoding, preprocessing and
+hashing run in a process pool, and Gemini calls go through a bounded thread
+pool. Screenshots with exactly the same pixels share one analysis. Every
+result is appended to the JSONL output as soon as it is ready; re-running
+with the same output skips images that already succeeded.
+"""
+
+import argparse
+import io
+import json
+import os
+import sys
+import tarfile
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+from PIL import Image
+
+from frame_diff import content_hash
+from preprocess import ImagePreprocessor
+from prompts import SYSTEM_PROMPT, build_analysis_prompt
+from resilience import ResilientCaller
+
+IMAGE_EXTENSIONS = (".png", ".jpg", ".jpeg", ".bmp", ".webp", ".gif")
+
+
+def iter_sources(path: str):
+    """Yield (name, bytes) for every image in a directory tree or tarball."""
+    if os.path.isdir(path):
+        for root, dirs, files in os.walk(path):
+            dirs.sort()
+            for file_name in sorted(files):
+                if file_name.lower().endswith(IMAGE_EXTENSIONS):
+                    full_path = os.path.join(root, file_name)
+                    with open(full_path, "rb") as f:
+                        yield os.path.relpath(full_path, path), f.read()
+    elif tarfile.is_tarfile(path):
+        # Stream mode reads members in order without building an index first
+        with tarfile.open(path, "r|*") as tar:
+            for member in tar:
+                if member.isfile() and member.name.lower().endswith(IMAGE_EXTENSIONS):
+                    yield member.name, tar.extractfile(member).read()
+    else:
+        raise ValueError(f"{path} is neither a directory nor a tar archive.")
+
+
+def prepare(name: str, data: bytes, options: dict) -> dict:
+    """Decode, hash and preprocess one image. Runs in a worker process."""
+    image = Image.open(io.BytesIO(data))
+    image.load()
+    image = image.convert("RGB")
+    payload = ImagePreprocessor(**options).process(image)
+    return {
+        "name": name,
+        "digest": content_hash(image),
+        "size": list(image.size),
+        "mime_type": payload.mime_type,
+        "data": payload.data,
+        "encoded_bytes": payload.encoded_bytes,
+        "encode_ms": payload.encode_ms,
+    }
+
+
+def load_completed(output: str) -> set:
+    """Names that already have a successful result in the output file."""
+    completed = set()
+    if not os.path.exists(output):
+        return completed
+    with open(output, "r", encoding="utf-8") as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError:
+                continue  # A partial last line from an interrupted run
+            if record.get("status") == "ok":
+                completed.add(record["name"])
+    return completed
+
+
+class BatchRunner:
+    def __init__(
+        self,
+        model,
+        output: str,
+        workers: int = None,
+        concurrency: int = 4,
+        query: str = None,
+        preprocess_options: dict = None,
+    ):
+        self.model = model
+        self.output = output
+        self.workers = workers or os.cpu_count()
+        self.concurrency = concurrency
+        self.prompt = build_analysis_prompt(SYSTEM_PROMPT, query)
+        self.preprocess_options = preprocess_options or {}
+        self.max_in_flight = self.workers + concurrency * 2
+        self.counts = {"ok": 0, "error": 0, "skipped": 0, "deduplicated": 0}
+        self._answers = {}
+        self._write_lock = threading.Lock()
+        self._slots = threading.BoundedSemaphore(self.max_in_flight)
+        # Room for one hedge or abandoned call per API thread
+        self.caller = ResilientCaller("gemini", deadline=60.0, max_workers=concurrency * 2)
+
+    def run(self, source: str) -> dict:
+        completed = load_completed(self.output)
+        with ProcessPoolExecutor(self.workers) as pool, ThreadPoolExecutor(
+            self.concurrency
+        ) as api, open(self.output, "a", encoding="utf-8") as out:
+            for name, data in iter_sources(source):
+                if name in completed:
+                    self.counts["skipped"] += 1
+                    continue
+                # Bounds memory: stop reading until an in-flight image is written out
+                self._slots.acquire()
+                future = pool.submit(prepare, name, data, self.preprocess_options)
+                future.add_done_callback(
+                    lambda f, name=name: api.submit(self._analyze, name, f, out)
+                )
+            for _ in range(self.max_in_flight):
+                self._slots.acquire()
+        self.caller.close()
+        return self.counts
+
+    def _analyze(self, name, prepared_future, out):
+        start = time.perf_counter()
+        deduplicated = False
+        try:
+            prepared = prepared_future.result()
+            blob = {"mime_type": prepared.pop("mime_type"), "data": prepared.pop("data")}
+            analysis = self._answers.get(prepared["digest"])
+            if analysis is None:
+                analysis = self.caller.call(self._generate, [self.prompt, blob])
+                self._answers[prepared["digest"]] = analysis
+            else:
+                deduplicated = True
+            record = {
+                **prepared,
+                "status": "ok",
+                "analysis": analysis,
+                "latency_ms": (time.perf_counter() - start) * 1000,
+            }
+        except Exception as e:
+            record = {"name": name, "status": "error", "error": str(e)}
+        try:
+            with self._write_lock:
+                self.counts[record["status"]] += 1
+                self.counts["deduplicated"] += deduplicated
+                out.write(json.dumps(record) + "\n")
+                out.flush()
+                done = self.counts["ok"] + self.counts["error"]
+                if done % 50 == 0:
+                    print(f"{done} images processed...", file=sys.stderr)
+        finally:
+            self._slots.release()
+
+    def _generate(self, contents) -> str:
+        return self.model.generate_content(
+            contents, request_options={"timeout": self.caller.deadline}
+        ).text
+
+
+def resolve_api_key(explicit: str = None) -> str:
+    """API key from the flag, GOOGLE_API_KEY, or the GUI's settings file."""
+    if explicit:
+        return explicit
+    if os.environ.get("GOOGLE_API_KEY"):
+        return os.environ["GOOGLE_API_KEY"]
+    try:
+        with open("app_settings.json", "r") as f:
+            return json.load(f).get("google_api_key")
+    except (IOError, json.JSONDecodeError):
+        return None
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Analyze a directory or tarball of screenshots with Gemini."
+    )
+    parser.add_argument("source", help="Directory or tar archive of screenshots.")
+    parser.add_argument("--output", default="results.jsonl")
+    parser.add_argument("--query", help="Question to ask about every screenshot.")
+    parser.add_argument("--workers", type=int, help="Preprocessing processes.")
+    parser.add_argument("--concurrency", type=int, default=4, help="Parallel API calls.")
+    parser.add_argument("--max-pixels", type=int, default=1_600_000)
+    parser.add_argument("--format", default="JPEG")
+    parser.add_argument("--quality", type=int, default=80)
+    parser.add_argument("--grayscale", action="store_true")
+    parser.add_argument("--api-key")
+    args = parser.parse_args(argv)
+
+    api_key = resolve_api_key(args.api_key)
+    if not api_key:
+        parser.error("No Google API key: pass --api-key or set GOOGLE_API_KEY.")
+
+    import google.generativeai as genai
+
+    genai.configure(api_key=api_key)
+    runner = BatchRunner(
+        genai.GenerativeModel("gemini-1.5-flash"),
+        args.output,
+        workers=args.workers,
+        concurrency=args.concurrency,
+        query=args.query,
+        preprocess_options={
+            "max_pixels": args.max_pixels,
+            "image_format": args.format,
+            "quality": args.quality,
+            "grayscale": args.grayscale,
+        },
+    )
+    counts = runner.run(args.source)
+    print(json.dumps(counts))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,4 @@
+"""Offline benchmarks for the AI Screen Reader Agent.
+
+Run from the ``desktop-app`` directory with ``python -m benchmarks.run``.
+"""
@@ -0,0 +1,170 @@
+"""Local stand-ins for Gemini and Murf so benchmarks run without API keys."""
+
+import io
+import json
+import math
+import struct
+import threading
+import time
+import wave
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import requests
+
+LOREM = (
+    "The window shows a project dashboard with three open tasks. "
+    "The first task is overdue and marked in red. "
+    "A notification in the top right says the build finished successfully. "
+    "The sidebar lists recent files, settings and a help link. "
+)
+
+
+class FakeChunk:
+    def __init__(self, text):
+        self.text = text
+
+
+class FakeResponse:
+    def __init__(self, text):
+        self.text = text
+
+
+class FakeVisionModel:
+    """Mimics ``GenerativeModel.generate_content`` with configurable latency.
+
+    ``first_token_s`` is the delay before the first streamed token and
+    ``tokens_per_s`` the streaming rate afterwards. Every inline image blob
+    is counted towards ``bytes_uploaded``.
+    """
+
+    def __init__(self, first_token_s=0.4, tokens_per_s=60.0, answer_words=120):
+        self.first_token_s = first_token_s
+        self.tokens_per_s = tokens_per_s
+        words = (LOREM * (answer_words // len(LOREM.split()) + 1)).split()
+        self.answer = " ".join(words[:answer_words])
+        self.calls = 0
+        self.bytes_uploaded = 0
+        self._lock = threading.Lock()
+
+    def _account(self, contents):
+        uploaded = 0
+        for part in contents if isinstance(contents, list) else [contents]:
+            if isinstance(part, dict) and "data" in part:
+                uploaded += len(part["data"])
+        with self._lock:
+            self.calls += 1
+            self.bytes_uploaded += uploaded
+
+    def generate_content(self, contents, stream=False, request_options=None):
+        self._account(contents)
+        time.sleep(self.first_token_s)
+        if not stream:
+            time.sleep(len(self.answer.split()) / self.tokens_per_s)
+            return FakeResponse(self.answer)
+        return self._stream()
+
+    def _stream(self):
+        for word in self.answer.split():
+            yield FakeChunk(word + " ")
+            time.sleep(1.0 / self.tokens_per_s)
+
+
+def make_wav(seconds: float = 0.2, rate: int = 44100) -> bytes:
+    """A short sine tone that pygame can load like a Murf audio file."""
+    buffer = io.BytesIO()
+    with wave.open(buffer, "wb") as wav:
+        wav.setnchannels(1)
+        wav.setsampwidth(2)
+        wav.setframerate(rate)
+        frames = int(seconds * rate)
+        wav.writeframes(
+            b"".join(
+                struct.pack("<h", int(3000 * math.sin(2 * math.pi * 440 * i / rate)))
+                for i in range(frames)
+            )
+        )
+    return buffer.getvalue()
+
+
+class MurfStandIn:
+    """Local HTTP server imitating Murf's generate and audio-file endpoints.
+
+    ``POST /v1/speech/generate`` waits ``generate_s`` plus ``per_char_s`` for
+    every character and returns an ``audioFile`` URL. ``GET /audio/<n>.wav``
+    serves a short WAV after ``download_s``.
+    """
+
+    def __init__(self, generate_s=0.3, per_char_s=0.0002, download_s=0.05):
+        self.generate_s = generate_s
+        self.per_char_s = per_char_s
+        self.download_s = download_s
+        self.audio = make_wav()
+        self.generate_calls = 0
+        self.bytes_uploaded = 0
+        stand_in = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, *args):
+                pass
+
+            def do_POST(self):
+                body = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+                text = json.loads(body).get("text", "")
+                stand_in.generate_calls += 1
+                stand_in.bytes_uploaded += len(body)
+                time.sleep(stand_in.generate_s + stand_in.per_char_s * len(text))
+                payload = json.dumps(
+                    {"audioFile": f"{stand_in.url}/audio/{stand_in.generate_calls}.wav"}
+                ).encode()
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(payload)))
+                self.end_headers()
+                self.wfile.write(payload)
+
+            def do_GET(self):
+                time.sleep(stand_in.download_s)
+                self.send_response(200)
+                self.send_header("Content-Type", "audio/wav")
+                self.send_header("Content-Length", str(len(stand_in.audio)))
+                self.end_headers()
+                self.wfile.write(stand_in.audio)
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.url = f"http://127.0.0.1:{self.server.server_address[1]}"
+        self._thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+class _GenerateResult:
+    def __init__(self, audio_file):
+        self.audio_file = audio_file
+
+
+class _TextToSpeech:
+    def __init__(self, base_url):
+        self.base_url = base_url
+        self.session = requests.Session()
+
+    def generate(self, text, voice_id, **kwargs):
+        response = self.session.post(
+            f"{self.base_url}/v1/speech/generate",
+            json={"text": text, "voiceId": voice_id},
+            timeout=30,
+        )
+        response.raise_for_status()
+        return _GenerateResult(response.json()["audioFile"])
+
+
+class LocalMurfClient:
+    """Drop-in for ``murf.Murf`` that talks to a ``MurfStandIn``."""
+
+    def __init__(self, base_url):
+        self.text_to_speech = _TextToSpeech(base_url)
@@ -0,0 +1,202 @@
+"""Offline end-to-end benchmarks for the screen reader pipeline.
+
+Usage (from the ``desktop-app`` directory)::
+
+    python -m benchmarks.run --resolutions 1080p,4k --json results.json
+
+Gemini is replaced by ``FakeVisionModel``, Murf by a local HTTP stand-in, and
+screen capture by ``FakeCaptureBackend`` fed with synthetic screenshots, so no
+API keys or network access are needed.
+"""
+
+import argparse
+import json
+import os
+import tempfile
+import time
+import tracemalloc
+
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+
+from app import AIScreenReaderAgent  # noqa: E402
+from benchmarks import screens  # noqa: E402
+from benchmarks.fakes import FakeVisionModel, LocalMurfClient, MurfStandIn  # noqa: E402
+from capture import FakeCaptureBackend  # noqa: E402
+from murf_synth import MurfSynthesizer  # noqa: E402
+from playback import PlaybackEngine  # noqa: E402
+from tts_cache import AudioCache  # noqa: E402
+from watch import ScreenWatcher  # noqa: E402
+
+
+class AudioProbe:
+    """Records when the first audio chunk starts playing."""
+
+    def __init__(self):
+        self.first_play = None
+        self._play = PlaybackEngine.play
+
+    def __enter__(self):
+        probe, original = self, self._play
+
+        def play(engine, audio_items, token=None, on_start=None):
+            def started():
+                if probe.first_play is None:
+                    probe.first_play = time.perf_counter()
+                if on_start:
+                    on_start()
+
+            return original(engine, audio_items, token, on_start=started)
+
+        PlaybackEngine.play = play
+        return self
+
+    def __exit__(self, *exc):
+        PlaybackEngine.play = self._play
+
+
+def build_agent(model, murf_url, cache_dir, frames):
+    agent = AIScreenReaderAgent(
+        status_callback=lambda message: None,
+        response_callback=lambda role, content: None,
+        response_part_callback=lambda role, content, done: None,
+    )
+    agent.google_api_key = "offline"
+    agent.gemini_model = model
+    agent.tts_provider = "murf"
+    agent.murf_client = LocalMurfClient(murf_url)
+    agent.tts_cache = AudioCache(cache_dir)
+    agent.murf_synth = MurfSynthesizer(
+        agent.murf_client, cache=agent.tts_cache, metrics=agent.metrics
+    )
+    agent.capture_backend = FakeCaptureBackend(frames)
+    return agent
+
+
+def wait_idle(agent, timeout=60.0):
+    deadline = time.monotonic() + timeout
+    while agent.is_reading and time.monotonic() < deadline:
+        time.sleep(0.01)
+
+
+def scenario_single_read(agent, size):
+    agent.smart_read_screen("screen")
+
+
+def scenario_follow_up(agent, size):
+    agent.smart_read_screen("screen")
+    agent.smart_read_screen("screen", "What does the second button do?")
+
+
+def scenario_long_narration(agent, size):
+    agent.gemini_model.answer = " ".join([agent.gemini_model.answer] * 8)
+    agent.smart_read_screen("screen")
+
+
+def scenario_continuous_watch(agent, size, timeout=120.0):
+    # Run until every frame has been captured, however long each capture
+    # takes on this machine, then let the narration finish
+    backend = agent.capture_backend
+    watcher = ScreenWatcher(agent, fps=100, max_calls_per_minute=30)
+    watcher.start()
+    deadline = time.monotonic() + timeout
+    while backend.index < len(backend.images) and time.monotonic() < deadline:
+        time.sleep(0.01)
+    watcher.stop(wait=True)
+    wait_idle(agent)
+
+
+def scenario_watch_own_window(agent, size):
+    # Only the agent's own window changes, which must never be narrated
+    backend = agent.capture_backend
+    backend.own_windows = {1}
+    backend.window_boxes = {1: screens.agent_window_box(size)}
+    model = agent.gemini_model
+    scenario_continuous_watch(agent, size)
+    if model.calls:
+        raise AssertionError(f"The agent's own window triggered {model.calls} vision call(s).")
+
+
+SCENARIOS = {
+    "single_read": (scenario_single_read, "static", 1),
+    "follow_up": (scenario_follow_up, "static", 1),
+    "long_narration": (scenario_long_narration, "static", 1),
+    "continuous_watch": (scenario_continuous_watch, "notification", 40),
+    "watch_own_window": (scenario_watch_own_window, "agent_window", 40),
+}
+
+
+def run_scenario(name, resolution, first_token_s, murf_generate_s):
+    func, pattern, frame_count = SCENARIOS[name]
+    size = screens.RESOLUTIONS[resolution]
+    frames = screens.frames(size, pattern, frame_count)
+    model = FakeVisionModel(first_token_s=first_token_s)
+    with MurfStandIn(generate_s=murf_generate_s) as murf, tempfile.TemporaryDirectory() as cache_dir:
+        agent = build_agent(model, murf.url, cache_dir, frames)
+        tracemalloc.start()
+        cpu_start = time.process_time()
+        start = time.perf_counter()
+        with AudioProbe() as probe:
+            func(agent, size)
+        elapsed = time.perf_counter() - start
+        cpu = time.process_time() - cpu_start
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        agent.engine.shutdown()
+        agent.murf_synth.close()
+        return {
+            "scenario": name,
+            "resolution": resolution,
+            "end_to_end_ms": elapsed * 1000,
+            "time_to_first_audio_ms": (
+                (probe.first_play - start) * 1000 if probe.first_play else None
+            ),
+            "vision_calls": model.calls,
+            "vision_bytes_uploaded": model.bytes_uploaded,
+            "tts_calls": murf.generate_calls,
+            "tts_bytes_uploaded": murf.bytes_uploaded,
+            "cpu_s": cpu,
+            "peak_python_mb": peak / (1024 * 1024),
+            "stages": agent.metrics.snapshot(),
+        }
+
+
+def format_row(result) -> str:
+    ttfa = result["time_to_first_audio_ms"]
+    return (
+        f"{result['scenario']:<18} {result['resolution']:<6} "
+        f"{result['end_to_end_ms']:>9.0f} "
+        f"{(f'{ttfa:.0f}' if ttfa is not None else '-'):>9} "
+        f"{result['vision_calls']:>6} {result['vision_bytes_uploaded'] / 1024:>9.0f} "
+        f"{result['cpu_s']:>7.2f} {result['peak_python_mb']:>8.1f}"
+    )
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--scenarios", default=",".join(SCENARIOS))
+    parser.add_argument("--resolutions", default="1080p")
+    parser.add_argument("--first-token-s", type=float, default=0.4)
+    parser.add_argument("--murf-generate-s", type=float, default=0.3)
+    parser.add_argument("--json", help="Write full results to this file.")
+    args = parser.parse_args(argv)
+
+    print(
+        f"{'scenario':<18} {'res':<6} {'e2e ms':>9} {'ttfa ms':>9} "
+        f"{'calls':>6} {'up KB':>9} {'cpu s':>7} {'peak MB':>8}"
+    )
+    results = []
+    for resolution in args.resolutions.split(","):
+        for name in args.scenarios.split(","):
+            result = run_scenario(
+                name, resolution, args.first_token_s, args.murf_generate_s
+            )
+            results.append(result)
+            print(format_row(result))
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
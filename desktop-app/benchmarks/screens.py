@@ -0,0 +1,69 @@
+"""Synthetic screenshots at several resolutions and change patterns."""
+
+import random
+
+from PIL import Image, ImageDraw
+
+RESOLUTIONS = {
+    "720p": (1280, 720),
+    "1080p": (1920, 1080),
+    "1440p": (2560, 1440),
+    "4k": (3840, 2160),
+}
+
+PATTERNS = ("static", "caret_blink", "notification", "scrolling", "full_change", "agent_window")
+
+
+def agent_window_box(size):
+    """Where the "agent_window" pattern pretends the agent's own window is."""
+    width, height = size
+    return (width // 2, height // 2, width - 40, height - 80)
+
+
+def desktop(size, seed: int = 0) -> Image.Image:
+    """A busy desktop: taskbar, window chrome, a sidebar and lines of text."""
+    rng = random.Random(seed)
+    width, height = size
+    image = Image.new("RGB", size, (32, 36, 44))
+    draw = ImageDraw.Draw(image)
+    draw.rectangle((0, height - 48, width, height), fill=(20, 20, 24))
+    for x in range(8, 400, 48):
+        draw.rectangle((x, height - 40, x + 32, height - 8), fill=(90, 120, 200))
+    left, top = width // 10, height // 10
+    right, bottom = width - left, height - height // 6
+    draw.rectangle((left, top, right, bottom), fill=(245, 245, 245))
+    draw.rectangle((left, top, right, top + 32), fill=(60, 90, 160))
+    draw.rectangle((left, top + 32, left + 220, bottom), fill=(228, 230, 236))
+    y = top + 48
+    while y < bottom - 24:
+        line_width = rng.randint(200, right - left - 260)
+        draw.text((left + 240, y), "x" * (line_width // 7), fill=(30, 30, 30))
+        y += 22
+    return image
+
+
+def frames(size, pattern: str, count: int, seed: int = 0) -> list:
+    """A sequence of ``count`` frames following one change pattern."""
+    base = desktop(size, seed)
+    width, height = size
+    result = []
+    for i in range(count):
+        frame = base.copy()
+        draw = ImageDraw.Draw(frame)
+        if pattern == "caret_blink" and i % 2:
+            draw.rectangle((width // 3, height // 3, width // 3 + 2, height // 3 + 18), fill=(0, 0, 0))
+        elif pattern == "notification" and i >= count // 2:
+            draw.rectangle((width - 420, 20, width - 20, 140), fill=(250, 220, 90))
+            draw.text((width - 400, 40), "Build finished: 3 warnings", fill=(0, 0, 0))
+        elif pattern == "scrolling":
+            frame = desktop(size, seed + i)
+        elif pattern == "full_change":
+            frame = desktop(size, seed + 1000 * (i + 1))
+        elif pattern == "agent_window":
+            # The agent's transcript grows for a while, then stays put
+            left, top, right, bottom = agent_window_box(size)
+            draw.rectangle((left, top, right, bottom), fill=(40, 40, 40))
+            for line in range(min(max(0, i - count // 2), 8)):
+                draw.text((left + 10, top + 10 + 20 * line), f"Assistant: line {line}", fill=(160, 190, 140))
+        result.append(frame)
+    return result
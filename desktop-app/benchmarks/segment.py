@@ -0,0 +1,86 @@
+"""Segmentation benchmark: throughput on very long model outputs.
+
+Usage (from the ``desktop-app`` directory)::
+
+    python -m benchmarks.segment --sizes 10000,100000,1000000
+
+Each size is streamed into ``SentenceSegmenter`` in small fragments, the way
+Gemini streams it, and the sentences are packed with ``chunk_sentences``. The
+time per character should stay flat as the size grows; a growing column means
+something has gone quadratic. The first chunk sizes show what the TTS
+provider receives first.
+"""
+
+import argparse
+import random
+import time
+
+from text_segment import SentenceSegmenter, chunk_sentences
+
+PARAGRAPHS = (
+    "## Overview\nThe window shows an invoice from Dr. Smith, e.g. items, "
+    "quantities and totals. The total is 1,234.56 dollars!\n",
+    "1. Open the **File** menu.\n2. Click [Export](https://example.com) and "
+    "choose PDF.\n3. Save it to the U.S. folder.\n",
+    "- A notification says the build finished...\n- Another one says it failed. ",
+    "This is a long sentence that keeps going without any terminal punctuation "
+    "for quite a while, separated only by commas, semicolons; and spaces ",
+)
+
+
+def model_output(size: int, seed: int = 0) -> str:
+    rng = random.Random(seed)
+    parts, length = [], 0
+    while length < size:
+        part = rng.choice(PARAGRAPHS)
+        parts.append(part)
+        length += len(part)
+    return "".join(parts)[:size]
+
+
+def fragments(text: str, seed: int = 0):
+    rng = random.Random(seed)
+    position = 0
+    while position < len(text):
+        step = rng.randint(1, 40)
+        yield text[position : position + step]
+        position += step
+
+
+def run(size: int) -> dict:
+    text = model_output(size)
+    pieces = list(fragments(text))
+    start = time.perf_counter()
+    segmenter = SentenceSegmenter()
+    sentences = []
+    for piece in pieces:
+        sentences.extend(segmenter.feed(piece))
+    sentences.extend(segmenter.flush())
+    chunks = list(chunk_sentences(sentences))
+    elapsed = time.perf_counter() - start
+    return {
+        "chars": size,
+        "seconds": elapsed,
+        "us_per_char": elapsed / size * 1e6,
+        "sentences": len(sentences),
+        "chunks": [len(c) for c in chunks],
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", default="10000,100000,1000000")
+    args = parser.parse_args(argv)
+
+    print(f"{'chars':>9} {'ms':>9} {'us/char':>8} {'sentences':>10}  first chunks")
+    for size in (int(s) for s in args.sizes.split(",")):
+        result = run(size)
+        print(
+            f"{result['chars']:>9} {result['seconds'] * 1000:>9.1f} "
+            f"{result['us_per_char']:>8.2f} {result['sentences']:>10}  "
+            f"{result['chunks'][:5]}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+"""Startup-time benchmark: how long until the main window is on screen.
+
+Usage (from the ``desktop-app`` directory)::
+
+    python -m benchmarks.startup --runs 5
+
+Every run starts a fresh interpreter. Cold runs point ``PYTHONPYCACHEPREFIX``
+at an empty directory so no cached bytecode can be reused. Each run also
+reports which heavy provider modules were imported before the window showed;
+with lazy providers that list should be empty.
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+
+HEAVY_MODULES = ("google.generativeai", "murf", "pyttsx3", "pygame", "requests", "win32ui")
+
+PROBE = f"""
+import json, sys, time
+start = time.perf_counter()
+import app
+window = app.App()
+window.update()
+shown = time.perf_counter() - start
+heavy = [m for m in {HEAVY_MODULES!r} if m in sys.modules]
+window.agent.shutdown()
+window.destroy()
+print(json.dumps({{"window_shown_s": shown, "heavy_modules": heavy}}))
+"""
+
+
+def run_once(cold: bool, configured: bool) -> dict:
+    env = dict(os.environ)
+    with tempfile.TemporaryDirectory() as settings_dir, tempfile.TemporaryDirectory() as pycache:
+        if configured:
+            # A dummy key makes the app register providers and schedule warm-up
+            with open(os.path.join(settings_dir, "app_settings.json"), "w") as f:
+                json.dump(
+                    {
+                        "google_api_key": "benchmark",
+                        "murf_api_key": "benchmark",
+                        "tts_provider": "murf",
+                    },
+                    f,
+                )
+        if cold:
+            env["PYTHONPYCACHEPREFIX"] = pycache
+        app_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+        env["PYTHONPATH"] = app_dir
+        output = subprocess.run(
+            [sys.executable, "-c", PROBE],
+            cwd=settings_dir,
+            env=env,
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Measure time until the window is shown.")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument(
+        "--unconfigured", action="store_true", help="Start without API keys."
+    )
+    args = parser.parse_args(argv)
+
+    for label, cold in (("cold", True), ("warm", False)):
+        results = [run_once(cold, not args.unconfigured) for _ in range(args.runs)]
+        times = [r["window_shown_s"] * 1000 for r in results]
+        heavy = sorted({m for r in results for m in r["heavy_modules"]})
+        print(
+            f"{label}: median {statistics.median(times):.0f} ms, "
+            f"max {max(times):.0f} ms, heavy modules loaded: {heavy or 'none'}"
+        )
+
+
+if __name__ == "__main__":
+    main()
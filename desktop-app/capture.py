@@ -0,0 +1,496 @@
+"""Screen-capture backends used by the AI Screen Reader Agent.
+
+Every backend hands out ``Frame`` objects that wrap a buffer owned by the
+backend. The buffer is reused on the next grab, so a frame is only valid until
+the following capture; ``Frame.to_image()`` decodes it into an independent
+image, and ``Frame.copy()`` keeps the raw frame itself.
+
+Monitors and regions are given in virtual-screen coordinates, where the
+primary monitor starts at (0, 0) and other monitors may have negative offsets.
+"""
+
+import ctypes
+import os
+import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from PIL import Image
+
+# Platform modules are imported by the backend that needs them, on first use
+win32api = win32con = win32gui = win32process = win32ui = None
+
+
+class Monitor:
+    """One display and its position on the virtual screen."""
+
+    def __init__(self, index: int, left: int, top: int, width: int, height: int, primary=False):
+        self.index = index
+        self.left = left
+        self.top = top
+        self.width = width
+        self.height = height
+        self.primary = primary
+
+    @property
+    def box(self):
+        return (self.left, self.top, self.left + self.width, self.top + self.height)
+
+    @property
+    def name(self) -> str:
+        return f"monitor {self.index}" + (" (primary)" if self.primary else "")
+
+    def __repr__(self):
+        return f"Monitor({self.index}, {self.box}, primary={self.primary})"
+
+
+class Frame:
+    """A captured frame backed by a (possibly shared) raw pixel buffer."""
+
+    def __init__(self, buffer, width: int, height: int, raw_mode: str = "BGRX"):
+        self.buffer = buffer
+        self.width = width
+        self.height = height
+        self.raw_mode = raw_mode
+
+    @property
+    def size(self):
+        return (self.width, self.height)
+
+    def to_image(self) -> Image.Image:
+        """Decode the buffer into a new RGB image.
+
+        BGRX is not a layout PIL can map in place, so this is one conversion
+        pass over the pixels; the result no longer depends on the buffer.
+        """
+        return Image.frombuffer(
+            "RGB", self.size, self.buffer, "raw", self.raw_mode, 0, 1
+        )
+
+    def copy(self) -> "Frame":
+        """Detach the frame from the backend's reusable buffer."""
+        return Frame(bytes(self.buffer), self.width, self.height, self.raw_mode)
+
+
+class CaptureBackend:
+    """Base class for capture backends."""
+
+    name = "base"
+    supports_windows = False
+
+    def grab_screen(self) -> Frame:
+        raise NotImplementedError
+
+    def grab_window(self, hwnd=None) -> Frame:
+        """Capture a single window. Backends without window support grab the screen."""
+        return self.grab_screen()
+
+    def foreground_window(self):
+        """Handle of the window in the foreground, or None without window support."""
+        return None
+
+    def owns_window(self, hwnd) -> bool:
+        """Whether the window belongs to this process, i.e. is the agent's own."""
+        return False
+
+    def own_window_boxes(self) -> list:
+        """Virtual-screen boxes of the agent's own visible windows."""
+        return []
+
+    def monitors(self) -> list:
+        """The attached displays, numbered from 1. Backends that cannot list
+        them report the captured screen as the only, primary monitor."""
+        frame = self.grab_screen()
+        return [Monitor(1, 0, 0, frame.width, frame.height, primary=True)]
+
+    def work_area(self):
+        """The (left, top, right, bottom) box of the primary monitor that the
+        taskbar does not cover, or None if the backend cannot tell."""
+        return None
+
+    def grab_region(self, box) -> Frame:
+        """Capture a (left, top, right, bottom) box of the virtual screen.
+
+        The default crops a full-screen grab; backends override it to copy
+        only the requested pixels.
+        """
+        image = self.grab_screen().to_image().crop(box)
+        return Frame(image.tobytes(), image.width, image.height, "RGB")
+
+    def spawn(self) -> "CaptureBackend":
+        """A backend of the same kind for use on another thread."""
+        return type(self)()
+
+    def close(self):
+        pass
+
+
+if sys.platform == "win32":
+
+    class _BitmapInfoHeader(ctypes.Structure):
+        _fields_ = [
+            ("biSize", ctypes.c_uint32),
+            ("biWidth", ctypes.c_int32),
+            ("biHeight", ctypes.c_int32),
+            ("biPlanes", ctypes.c_uint16),
+            ("biBitCount", ctypes.c_uint16),
+            ("biCompression", ctypes.c_uint32),
+            ("biSizeImage", ctypes.c_uint32),
+            ("biXPelsPerMeter", ctypes.c_int32),
+            ("biYPelsPerMeter", ctypes.c_int32),
+            ("biClrUsed", ctypes.c_uint32),
+            ("biClrImportant", ctypes.c_uint32),
+        ]
+
+
+class GdiCaptureBackend(CaptureBackend):
+    """Win32 GDI capture that keeps its DCs and bitmap alive between grabs.
+
+    The device contexts and bitmap are only rebuilt when the target window or
+    its size changes. Pixels are copied with ``GetDIBits`` straight into a
+    preallocated buffer instead of ``GetBitmapBits``, which returns a fresh
+    bytes object on every call.
+    """
+
+    name = "gdi"
+    supports_windows = True
+
+    def __init__(self):
+        global win32api, win32con, win32gui, win32process, win32ui
+        try:
+            import win32api
+            import win32con
+            import win32gui
+            import win32process
+            import win32ui
+        except ImportError:
+            raise RuntimeError("GDI capture requires pywin32 on Windows.")
+        self._key = None
+        self._hwnd = None
+        self._hwnd_dc = None
+        self._mfc_dc = None
+        self._save_dc = None
+        self._bitmap = None
+        self._buffer = None
+        self._header = None
+
+    def _ensure_resources(self, hwnd, width, height):
+        key = (hwnd, width, height)
+        if key == self._key:
+            return
+        self._release()
+        self._hwnd = hwnd
+        self._hwnd_dc = win32gui.GetWindowDC(hwnd)
+        self._mfc_dc = win32ui.CreateDCFromHandle(self._hwnd_dc)
+        self._save_dc = self._mfc_dc.CreateCompatibleDC()
+        self._bitmap = win32ui.CreateBitmap()
+        self._bitmap.CreateCompatibleBitmap(self._mfc_dc, width, height)
+        self._save_dc.SelectObject(self._bitmap)
+        self._buffer = (ctypes.c_char * (width * height * 4))()
+
+        header = _BitmapInfoHeader()
+        header.biSize = ctypes.sizeof(_BitmapInfoHeader)
+        header.biWidth = width
+        header.biHeight = -height  # Negative height gives a top-down bitmap
+        header.biPlanes = 1
+        header.biBitCount = 32
+        header.biCompression = 0  # BI_RGB
+        self._header = header
+        self._key = key
+
+    def _grab(self, hwnd, width, height, origin=(0, 0)) -> Frame:
+        self._ensure_resources(hwnd, width, height)
+        self._save_dc.BitBlt(
+            (0, 0), (width, height), self._mfc_dc, origin, win32con.SRCCOPY
+        )
+        lines = ctypes.windll.gdi32.GetDIBits(
+            self._save_dc.GetSafeHdc(),
+            self._bitmap.GetHandle(),
+            0,
+            height,
+            self._buffer,
+            ctypes.byref(self._header),
+            0,  # DIB_RGB_COLORS
+        )
+        if lines != height:
+            raise RuntimeError("GetDIBits copied an incomplete frame.")
+        return Frame(memoryview(self._buffer).cast("B"), width, height, "BGRX")
+
+    def grab_window(self, hwnd=None) -> Frame:
+        hwnd = hwnd or win32gui.GetForegroundWindow()
+        x, y, right, bottom = win32gui.GetWindowRect(hwnd)
+        return self._grab(hwnd, right - x, bottom - y)
+
+    def foreground_window(self):
+        return win32gui.GetForegroundWindow() or None
+
+    def owns_window(self, hwnd) -> bool:
+        return win32process.GetWindowThreadProcessId(hwnd)[1] == os.getpid()
+
+    def own_window_boxes(self) -> list:
+        boxes = []
+
+        def collect(hwnd, _):
+            if win32gui.IsWindowVisible(hwnd) and not win32gui.IsIconic(hwnd) and self.owns_window(hwnd):
+                boxes.append(win32gui.GetWindowRect(hwnd))
+            return True
+
+        win32gui.EnumWindows(collect, None)
+        return boxes
+
+    def grab_screen(self) -> Frame:
+        hwnd = win32gui.GetDesktopWindow()
+        width = ctypes.windll.user32.GetSystemMetrics(0)
+        height = ctypes.windll.user32.GetSystemMetrics(1)
+        return self._grab(hwnd, width, height)
+
+    def grab_region(self, box) -> Frame:
+        # The desktop DC spans the virtual screen, so other monitors are
+        # reached through (possibly negative) source offsets
+        left, top, right, bottom = box
+        return self._grab(win32gui.GetDesktopWindow(), right - left, bottom - top, (left, top))
+
+    def monitors(self) -> list:
+        monitors = []
+        for handle, _, _ in win32api.EnumDisplayMonitors():
+            info = win32api.GetMonitorInfo(handle)
+            left, top, right, bottom = info["Monitor"]
+            primary = bool(info["Flags"] & 1)  # MONITORINFOF_PRIMARY
+            monitors.append((not primary, left, top, right - left, bottom - top, primary))
+        monitors.sort()
+        return [Monitor(i, *m[1:]) for i, m in enumerate(monitors, 1)]
+
+    def work_area(self):
+        # MONITOR_DEFAULTTOPRIMARY; the primary monitor contains (0, 0)
+        handle = win32api.MonitorFromPoint((0, 0), 1)
+        return tuple(win32api.GetMonitorInfo(handle)["Work"])
+
+    def _release(self):
+        try:
+            if self._bitmap is not None:
+                win32gui.DeleteObject(self._bitmap.GetHandle())
+            if self._save_dc is not None:
+                self._save_dc.DeleteDC()
+            if self._mfc_dc is not None:
+                self._mfc_dc.DeleteDC()
+            if self._hwnd_dc is not None:
+                win32gui.ReleaseDC(self._hwnd, self._hwnd_dc)
+        finally:
+            self._key = self._hwnd = self._hwnd_dc = None
+            self._mfc_dc = self._save_dc = self._bitmap = None
+            self._buffer = self._header = None
+
+    def close(self):
+        self._release()
+
+
+class MssCaptureBackend(CaptureBackend):
+    """Portable capture through ``mss`` (XShm on Linux, Quartz on macOS)."""
+
+    name = "mss"
+
+    def __init__(self, monitor_index: int = 1):
+        try:
+            import mss
+        except ImportError:
+            raise RuntimeError("mss is not installed.")
+        self._sct = mss.mss()
+        self.monitor_index = monitor_index
+
+    def grab_screen(self) -> Frame:
+        shot = self._sct.grab(self._sct.monitors[self.monitor_index])
+        return Frame(memoryview(shot.raw), shot.width, shot.height, "BGRX")
+
+    def grab_region(self, box) -> Frame:
+        left, top, right, bottom = box
+        shot = self._sct.grab(
+            {"left": left, "top": top, "width": right - left, "height": bottom - top}
+        )
+        return Frame(memoryview(shot.raw), shot.width, shot.height, "BGRX")
+
+    def monitors(self) -> list:
+        # Entry 0 is the whole virtual screen; mss lists the primary first
+        return [
+            Monitor(i, m["left"], m["top"], m["width"], m["height"], primary=i == 1)
+            for i, m in enumerate(self._sct.monitors[1:], 1)
+        ]
+
+    def spawn(self) -> "MssCaptureBackend":
+        # mss handles must not be shared between threads
+        return MssCaptureBackend(self.monitor_index)
+
+    def close(self):
+        self._sct.close()
+
+
+class PyAutoGuiCaptureBackend(CaptureBackend):
+    """Last-resort backend that wraps ``pyautogui.screenshot()``."""
+
+    name = "pyautogui"
+
+    def grab_screen(self) -> Frame:
+        import pyautogui
+
+        image = pyautogui.screenshot().convert("RGB")
+        return Frame(image.tobytes(), image.width, image.height, "RGB")
+
+    def grab_region(self, box) -> Frame:
+        import pyautogui
+
+        left, top, right, bottom = box
+        region = (left, top, right - left, bottom - top)
+        image = pyautogui.screenshot(region=region).convert("RGB")
+        return Frame(image.tobytes(), image.width, image.height, "RGB")
+
+    def spawn(self):
+        return self
+
+
+class FakeCaptureBackend(CaptureBackend):
+    """In-memory backend for tests and benchmarks.
+
+    Serves the given PIL images in order and keeps returning the last one once
+    the list is exhausted. Set ``window`` to pretend a window has the focus
+    (and add it to ``own_windows`` to pretend it is the agent's own, with
+    its box in ``window_boxes``), ``layout`` to a list of monitor boxes to split the image into monitors
+    (one monitor covering the whole image by default), and ``work_box`` to
+    the part of the screen a pretend taskbar leaves free.
+    """
+
+    name = "fake"
+    supports_windows = True
+
+    def __init__(self, images=None, size=(1280, 720), color=(0, 0, 0), layout=None):
+        self.images = list(images) if images else [Image.new("RGB", size, color)]
+        self.index = 0
+        self.grab_count = 0
+        self.window = None
+        self.own_windows = set()
+        self.window_boxes = {}
+        self.layout = layout
+        self.work_box = None
+        self._lock = threading.Lock()
+
+    def foreground_window(self):
+        return self.window
+
+    def work_area(self):
+        return self.work_box
+
+    def owns_window(self, hwnd) -> bool:
+        return hwnd in self.own_windows
+
+    def own_window_boxes(self) -> list:
+        return [self.window_boxes[h] for h in self.own_windows if h in self.window_boxes]
+
+    def monitors(self) -> list:
+        if not self.layout:
+            width, height = self.images[0].size
+            return [Monitor(1, 0, 0, width, height, primary=True)]
+        return [
+            Monitor(i, left, top, right - left, bottom - top, primary=i == 1)
+            for i, (left, top, right, bottom) in enumerate(self.layout, 1)
+        ]
+
+    def grab_region(self, box) -> Frame:
+        with self._lock:
+            image = self.images[min(self.index, len(self.images) - 1)]
+            self.grab_count += 1
+        image = image.convert("RGB").crop(box)
+        return Frame(image.tobytes(), image.width, image.height, "RGB")
+
+    def spawn(self):
+        return self
+
+    def push(self, image: Image.Image):
+        self.images.append(image)
+
+    def grab_screen(self) -> Frame:
+        image = self.images[min(self.index, len(self.images) - 1)].convert("RGB")
+        self.index += 1
+        self.grab_count += 1
+        return Frame(image.tobytes(), image.width, image.height, "RGB")
+
+
+class ParallelCapture:
+    """Grabs several regions at once, one backend per worker thread.
+
+    Backends keep per-thread resources (DCs, mss handles), so each worker
+    captures through its own ``backend.spawn()``. Frames are decoded into
+    images on the worker, before its buffer is reused.
+    """
+
+    def __init__(self, backend: CaptureBackend, workers: int = 3):
+        self.backend = backend
+        self._local = threading.local()
+        self._spawned = []
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(workers, thread_name_prefix="capture")
+
+    def _thread_backend(self) -> CaptureBackend:
+        backend = getattr(self._local, "backend", None)
+        if backend is None:
+            backend = self._local.backend = self.backend.spawn()
+            if backend is not self.backend:
+                with self._lock:
+                    self._spawned.append(backend)
+        return backend
+
+    def _grab(self, box) -> Image.Image:
+        frame = self._thread_backend().grab_region(box)
+        return frame.to_image()
+
+    def grab(self, boxes) -> list:
+        """Capture every box in parallel; images come back in the same order."""
+        if len(boxes) == 1:
+            return [self._grab(boxes[0])]
+        return list(self._executor.map(self._grab, boxes))
+
+    def close(self):
+        self._executor.shutdown(wait=True)
+        with self._lock:
+            spawned, self._spawned = self._spawned, []
+        for backend in spawned:
+            backend.close()
+
+
+def stitch(images, boxes, labels=None) -> Image.Image:
+    """Place captures on one canvas at their relative screen positions.
+
+    The stitched image's ``info["parts"]`` lists each part's label and box on
+    the canvas, so it can be split up again later.
+    """
+    left = min(box[0] for box in boxes)
+    top = min(box[1] for box in boxes)
+    width = max(box[2] for box in boxes) - left
+    height = max(box[3] for box in boxes) - top
+    labels = labels or [f"part {i}" for i in range(1, len(images) + 1)]
+    canvas = Image.new("RGB", (width, height))
+    parts = []
+    for image, box, label in zip(images, boxes, labels):
+        offset = (box[0] - left, box[1] - top)
+        canvas.paste(image, offset)
+        parts.append((label, (*offset, offset[0] + image.width, offset[1] + image.height)))
+    canvas.info["parts"] = parts
+    return canvas
+
+
+BACKENDS = {
+    GdiCaptureBackend.name: GdiCaptureBackend,
+    MssCaptureBackend.name: MssCaptureBackend,
+    PyAutoGuiCaptureBackend.name: PyAutoGuiCaptureBackend,
+    FakeCaptureBackend.name: FakeCaptureBackend,
+}
+
+
+def create_capture_backend(preferred: str = None) -> CaptureBackend:
+    """Return the preferred backend, or the fastest one available here."""
+    if preferred:
+        return BACKENDS[preferred]()
+    order = ["gdi", "mss"] if sys.platform == "win32" else ["mss"]
+    for name in order:
+        try:
+            return BACKENDS[name]()
+        except Exception:
+            continue
+    return PyAutoGuiCaptureBackend()
@@ -0,0 +1,253 @@
+"""Asyncio job engine that runs agent work with cancellation and coalescing."""
+
+import asyncio
+import itertools
+import threading
+import traceback
+
+PRIORITY_INTERACTIVE = 0
+PRIORITY_BACKGROUND = 10
+PRIORITY_PREFETCH = 20
+
+
+class JobCancelled(Exception):
+    """Raised inside a job when its cancellation token has been triggered."""
+
+
+class CancelToken:
+    """Thread-safe cancellation flag shared by every stage of a job.
+
+    Stages poll ``cancelled``, call ``raise_if_cancelled`` between steps, or
+    block on ``wait`` instead of sleeping. Callbacks registered with
+    ``on_cancel`` interrupt blocking work such as audio playback.
+    """
+
+    def __init__(self):
+        self._event = threading.Event()
+        self._callbacks = []
+        self._lock = threading.Lock()
+
+    @property
+    def cancelled(self) -> bool:
+        return self._event.is_set()
+
+    def cancel(self):
+        with self._lock:
+            if self._event.is_set():
+                return
+            self._event.set()
+            callbacks, self._callbacks = self._callbacks, []
+        for callback in callbacks:
+            try:
+                callback()
+            except Exception:
+                pass
+
+    def on_cancel(self, callback):
+        with self._lock:
+            if not self._event.is_set():
+                self._callbacks.append(callback)
+                return
+        callback()
+
+    def remove_callback(self, callback):
+        with self._lock:
+            if callback in self._callbacks:
+                self._callbacks.remove(callback)
+
+    def wait(self, timeout: float = None) -> bool:
+        """Sleep up to ``timeout`` seconds; return True early if cancelled."""
+        return self._event.wait(timeout)
+
+    def raise_if_cancelled(self):
+        if self._event.is_set():
+            raise JobCancelled()
+
+
+class Job:
+    def __init__(self, name, func, args, priority, key):
+        self.name = name
+        self.func = func
+        self.args = args
+        self.priority = priority
+        self.key = key
+        self.token = CancelToken()
+        self.result = None
+        self.error = None
+        self.state = "pending"
+        self._done = threading.Event()
+        self._callbacks = []
+        self._lock = threading.Lock()
+
+    @property
+    def done(self) -> bool:
+        return self._done.is_set()
+
+    def cancel(self):
+        self.token.cancel()
+
+    def add_done_callback(self, callback):
+        """Call ``callback(job)`` once the job finishes, fails or is cancelled,
+        even if it is cancelled before it ever starts running."""
+        with self._lock:
+            if not self._done.is_set():
+                self._callbacks.append(callback)
+                return
+        callback(self)
+
+    def _finish(self):
+        with self._lock:
+            self._done.set()
+            callbacks, self._callbacks = self._callbacks, []
+        for callback in callbacks:
+            try:
+                callback(self)
+            except Exception:
+                pass  # A failing callback must not take an engine worker down
+
+    def wait(self, timeout: float = None):
+        self._done.wait(timeout)
+        return self.result
+
+
+class AgentEngine:
+    """Runs agent jobs from a prioritized queue on a private event loop.
+
+    Each job is a blocking pipeline (capture, analyze, synthesize, play) that
+    runs in a worker thread and receives a ``token`` keyword argument it must
+    check between stages. Jobs submitted with the same ``key`` while one is
+    still pending or running are coalesced into the existing job, and
+    ``submit`` returns ``None`` once ``max_pending`` jobs are waiting, so rapid
+    clicks cannot pile up unbounded work. A job that raises is marked
+    "failed", its traceback is printed, and ``on_error(job, error)`` is called
+    so the failure can be shown to the user.
+    """
+
+    def __init__(self, workers: int = 2, max_pending: int = 4, on_error=None):
+        self.workers = workers
+        self.max_pending = max_pending
+        self.on_error = on_error
+        self.loop = None
+        self._queue = None
+        self._jobs = []
+        self._lock = threading.Lock()
+        self._counter = itertools.count()
+        self._started = threading.Event()
+        self._thread = None
+        self._workers = []
+
+    def start(self):
+        if self._thread is not None:
+            return
+        self._thread = threading.Thread(
+            target=self._run_loop, name="agent-engine", daemon=True
+        )
+        self._thread.start()
+        self._started.wait()
+
+    def _run_loop(self):
+        self.loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(self.loop)
+        self._queue = asyncio.PriorityQueue()
+        self._workers = [self.loop.create_task(self._worker()) for _ in range(self.workers)]
+        self.loop.call_soon(self._started.set)
+        try:
+            self.loop.run_forever()
+        finally:
+            self.loop.close()
+
+    async def _worker(self):
+        while True:
+            _, _, job = await self._queue.get()
+            try:
+                if job.token.cancelled:
+                    job.state = "cancelled"
+                    continue
+                job.state = "running"
+                job.result = await asyncio.to_thread(
+                    job.func, *job.args, token=job.token
+                )
+                job.state = "cancelled" if job.token.cancelled else "done"
+            except JobCancelled:
+                job.state = "cancelled"
+            except asyncio.CancelledError:
+                job.state = "cancelled"
+                raise  # The engine is shutting down
+            except Exception as e:
+                job.error = e
+                job.state = "failed"
+                self._report(job, e)
+            finally:
+                with self._lock:
+                    self._jobs.remove(job)
+                job._finish()
+                self._queue.task_done()
+
+    def _report(self, job, error):
+        traceback.print_exception(type(error), error, error.__traceback__)
+        if self.on_error:
+            try:
+                self.on_error(job, error)
+            except Exception:
+                traceback.print_exc()
+
+    def submit(
+        self, name, func, *args, priority=PRIORITY_INTERACTIVE, key=None
+    ) -> Job:
+        """Queue ``func(*args, token=...)``; returns the job, or None if busy."""
+        self.start()
+        with self._lock:
+            if key is not None:
+                for job in self._jobs:
+                    if job.key == key and not job.token.cancelled:
+                        return job
+            pending = sum(1 for job in self._jobs if job.state == "pending")
+            if pending >= self.max_pending:
+                return None
+            job = Job(name, func, args, priority, key)
+            self._jobs.append(job)
+        entry = (priority, next(self._counter), job)
+        self.loop.call_soon_threadsafe(self._queue.put_nowait, entry)
+        return job
+
+    def cancel_all(self, priority: int = None):
+        """Cancel every pending and running job, optionally of one priority only."""
+        with self._lock:
+            jobs = list(self._jobs)
+        for job in jobs:
+            if priority is None or job.priority == priority:
+                job.cancel()
+
+    def active_jobs(self) -> list:
+        with self._lock:
+            return [job for job in self._jobs if not job.token.cancelled]
+
+    def shutdown(self, timeout: float = 5.0):
+        """Cancel every job, stop the workers and close the event loop.
+
+        Jobs already running in a thread get up to ``timeout`` seconds to
+        notice their cancelled token and return.
+        """
+        self.cancel_all()
+        if self._thread is None:
+            return
+        asyncio.run_coroutine_threadsafe(self._stop(timeout), self.loop)
+        self._thread.join(timeout + 1)
+        self._thread = None
+        self._started.clear()
+
+    async def _stop(self, timeout: float):
+        for task in self._workers:
+            task.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        while not self._queue.empty():
+            _, _, job = self._queue.get_nowait()
+            job.state = "cancelled"
+            with self._lock:
+                self._jobs.remove(job)
+            job._finish()
+        try:
+            await asyncio.wait_for(self.loop.shutdown_default_executor(), timeout)
+        except asyncio.TimeoutError:
+            pass
+        self.loop.stop()
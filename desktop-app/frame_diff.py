@@ -0,0 +1,120 @@
+"""Frame-change detection and analysis caching.
+
+Analyses are cached on ``content_hash``, an exact hash of a frame's pixels:
+a perceptual "effectively unchanged" score cannot tell one number in a
+dialog from another. Where it matters which parts of a frame changed,
+``tile_hashes`` hashes every tile exactly, so they can be compared cheaply.
+"""
+
+import hashlib
+import threading
+from collections import OrderedDict
+
+from PIL import Image
+
+
+def content_hash(image: Image.Image) -> str:
+    """Exact hash of an image's pixels; any changed pixel changes it."""
+    digest = hashlib.blake2b(digest_size=16)
+    digest.update(f"{image.mode}:{image.size[0]}x{image.size[1]}:".encode())
+    digest.update(image.tobytes())
+    return digest.hexdigest()
+
+
+class TileHashes:
+    """Exact hashes of a frame's tiles at full resolution.
+
+    Any changed pixel changes its tile's hash, so a changed digit or a small
+    dialog is never averaged away.
+    """
+
+    def __init__(self, size, tile: int, hashes: tuple, raw: bytes = None):
+        self.size = size
+        self.tile = tile
+        self.hashes = hashes
+        self.raw = raw
+        self.cols = -(-size[0] // tile)
+        self.rows = -(-size[1] // tile)
+
+    def tile_box(self, index: int):
+        """Return the (left, top, right, bottom) box of a tile in frame pixels."""
+        col, row = index % self.cols, index // self.cols
+        return (
+            col * self.tile,
+            row * self.tile,
+            min(self.size[0], (col + 1) * self.tile),
+            min(self.size[1], (row + 1) * self.tile),
+        )
+
+
+def tile_hashes(image: Image.Image, tile: int = 32, previous: TileHashes = None) -> TileHashes:
+    """Hash every ``tile``-pixel square of an image.
+
+    Rows of tiles whose pixels are identical to ``previous`` (the frame
+    before, if it kept its ``raw`` pixels) reuse its hashes, so a mostly
+    static screen costs little more than a comparison.
+    """
+    image = image.convert("RGB")
+    width, height = image.size
+    raw = image.tobytes()
+    stride = width * 3
+    cols = -(-width // tile)
+    if previous is not None and (previous.size, previous.tile) != (image.size, tile):
+        previous = None
+    hashes = []
+    for top in range(0, height, tile):
+        bottom = min(height, top + tile)
+        stripe = slice(top * stride, bottom * stride)
+        if previous is not None and previous.raw is not None and raw[stripe] == previous.raw[stripe]:
+            row = top // tile
+            hashes.extend(previous.hashes[row * cols : (row + 1) * cols])
+            continue
+        for left in range(0, stride, tile * 3):
+            right = min(stride, left + tile * 3)
+            data = b"".join(raw[y * stride + left : y * stride + right] for y in range(top, bottom))
+            hashes.append(hash(data))
+    return TileHashes(image.size, tile, tuple(hashes), raw)
+
+
+def changed_tile_hashes(old: TileHashes, new: TileHashes) -> list:
+    """Indices of the tiles whose pixels differ between two frames."""
+    if old.size != new.size or old.tile != new.tile:
+        return list(range(len(new.hashes)))
+    return [i for i, (a, b) in enumerate(zip(old.hashes, new.hashes)) if a != b]
+
+
+class AnalysisCache:
+    """Bounded LRU cache of analyses keyed on (frame key, normalized query)."""
+
+    def __init__(self, max_entries: int = 64):
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def make_key(frame_key: str, query: str = None):
+        return (frame_key, " ".join((query or "").lower().split()))
+
+    def get(self, frame_key: str, query: str = None):
+        key = self.make_key(frame_key, query)
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return self._entries[key]
+            self.misses += 1
+            return None
+
+    def put(self, frame_key: str, query: str, analysis: str):
+        key = self.make_key(frame_key, query)
+        with self._lock:
+            self._entries[key] = analysis
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
@@ -0,0 +1,265 @@
+"""Compressed in-memory history of recent screen frames.
+
+Frames are cut into square tiles. A tile is compressed and stored only the
+first time its exact pixels are seen; every frame is then a tuple of
+references into that shared tile store. Unchanged parts of the screen (most of
+it, most of the time) cost a reference per tile instead of pixels, so minutes
+of history fit in a few megabytes. Since each frame references its tiles
+directly rather than chaining deltas, any retained frame can be rebuilt on its
+own and the oldest frame can always be dropped.
+"""
+
+import hashlib
+import threading
+import time
+import zlib
+from collections import deque
+
+from PIL import Image
+
+
+class HistoryFrame:
+    """One retained frame: when it was captured and its tile references."""
+
+    def __init__(self, timestamp: float, size, tile: int, tiles: tuple):
+        self.timestamp = timestamp
+        self.size = size
+        self.tile = tile
+        self.tiles = tiles
+        self.cols = -(-size[0] // tile)
+        self.rows = -(-size[1] // tile)
+
+    def tile_box(self, index: int):
+        """Return the (left, top, right, bottom) box of a tile in frame pixels."""
+        col, row = index % self.cols, index // self.cols
+        return (
+            col * self.tile,
+            row * self.tile,
+            min(self.size[0], (col + 1) * self.tile),
+            min(self.size[1], (row + 1) * self.tile),
+        )
+
+
+class FrameHistory:
+    """Ring buffer of recent frames under a memory ceiling.
+
+    ``max_bytes`` bounds the compressed tiles plus the raw pixels of the newest
+    frame, which is kept to skip unchanged rows of tiles cheaply. The oldest
+    frames are dropped first; the newest frame is always retained.
+    """
+
+    def __init__(self, max_bytes: int = 64 * 1024 * 1024, max_frames: int = 600, tile: int = 64):
+        self.max_bytes = max_bytes
+        self.max_frames = max_frames
+        self.tile = tile
+        self.frames = deque()
+        self._tiles = {}  # digest -> [digest, compressed bytes, reference count]
+        self._tile_bytes = 0
+        self._last = None  # (raw pixels, frame) of the newest frame
+        self._lock = threading.Lock()
+
+    def add(self, image: Image.Image, timestamp: float = None) -> HistoryFrame:
+        timestamp = time.time() if timestamp is None else timestamp
+        image = image.convert("RGB")
+        width, height = image.size
+        raw = image.tobytes()
+        stride = width * 3
+        cols, rows = -(-width // self.tile), -(-height // self.tile)
+        last = self._last
+        if last is not None and last[1].size != image.size:
+            last = None
+
+        digests, new_tiles = [], {}
+        for row in range(rows):
+            top, bottom = row * self.tile, min(height, (row + 1) * self.tile)
+            stripe = slice(top * stride, bottom * stride)
+            if last is not None and raw[stripe] == last[0][stripe]:
+                digests.extend(last[1].tiles[row * cols : (row + 1) * cols])
+                continue
+            for col in range(cols):
+                left, right = col * self.tile * 3, min(width, (col + 1) * self.tile) * 3
+                data = b"".join(
+                    raw[y * stride + left : y * stride + right] for y in range(top, bottom)
+                )
+                digest = hashlib.blake2b(data, digest_size=16).digest()
+                if digest not in self._tiles and digest not in new_tiles:
+                    new_tiles[digest] = zlib.compress(data, 1)
+                digests.append(digest)
+
+        with self._lock:
+            tiles = []
+            for digest in digests:
+                entry = self._tiles.get(digest)
+                if entry is None:
+                    entry = self._tiles[digest] = [digest, new_tiles[digest], 0]
+                    self._tile_bytes += len(entry[1])
+                entry[2] += 1
+                tiles.append(entry[0])  # Share one bytes object per digest
+            frame = HistoryFrame(timestamp, image.size, self.tile, tuple(tiles))
+            self.frames.append(frame)
+            self._last = (raw, frame)
+            self._evict()
+        return frame
+
+    @property
+    def memory_bytes(self) -> int:
+        raw = len(self._last[0]) if self._last else 0
+        # A tuple slot per tile reference, plus the stored tiles and raw frame
+        return self._tile_bytes + raw + sum(8 * len(f.tiles) + 96 for f in self.frames)
+
+    def _evict(self):
+        while len(self.frames) > 1 and (
+            len(self.frames) > self.max_frames or self.memory_bytes > self.max_bytes
+        ):
+            self._drop_oldest()
+
+    def _drop_oldest(self):
+        for digest in self.frames.popleft().tiles:
+            entry = self._tiles[digest]
+            entry[2] -= 1
+            if entry[2] == 0:
+                del self._tiles[digest]
+                self._tile_bytes -= len(entry[1])
+
+    def drop_oldest(self) -> bool:
+        """Drop the oldest frame, unless it is the only one left."""
+        with self._lock:
+            if len(self.frames) <= 1:
+                return False
+            self._drop_oldest()
+            return True
+
+    @property
+    def newest(self):
+        return self.frames[-1] if self.frames else None
+
+    def frame_at(self, timestamp: float, size=None):
+        """The last frame captured at or before ``timestamp`` (optionally of
+        one size), or the oldest retained one if the history is shorter."""
+        with self._lock:
+            candidates = [f for f in self.frames if size is None or f.size == size]
+        found = None
+        for frame in candidates:
+            if frame.timestamp > timestamp:
+                break
+            found = frame
+        return found or (candidates[0] if candidates else None)
+
+    def reconstruct(self, frame: HistoryFrame) -> Image.Image:
+        """Rebuild the full image of a retained frame."""
+        with self._lock:
+            if frame not in self.frames:
+                raise KeyError("Frame is no longer in the history.")
+            stored = {digest: self._tiles[digest][1] for digest in frame.tiles}
+        width, height = frame.size
+        stride = width * 3
+        pixels = bytearray(stride * height)
+        decoded = {}
+        for index, digest in enumerate(frame.tiles):
+            data = decoded.get(digest)
+            if data is None:
+                data = decoded[digest] = zlib.decompress(stored[digest])
+            left, top, right, bottom = frame.tile_box(index)
+            row_bytes = (right - left) * 3
+            for y in range(bottom - top):
+                offset = (top + y) * stride + left * 3
+                pixels[offset : offset + row_bytes] = data[y * row_bytes : (y + 1) * row_bytes]
+        return Image.frombytes("RGB", frame.size, bytes(pixels))
+
+    def changed_tiles(self, old: HistoryFrame, new: HistoryFrame) -> list:
+        """Indices of tiles that differ between two frames, without decoding."""
+        if old.size != new.size:
+            return list(range(len(new.tiles)))
+        return [i for i, (a, b) in enumerate(zip(old.tiles, new.tiles)) if a is not b]
+
+    def changed_mask(self, start: float, end: float) -> Image.Image:
+        """Mask (white where changed) between the frames at two timestamps."""
+        new = self.frame_at(end)
+        if new is None:
+            raise KeyError("The history is empty.")
+        old = self.frame_at(start, new.size)
+        mask = Image.new("L", new.size, 0)
+        for index in self.changed_tiles(old, new):
+            mask.paste(255, new.tile_box(index))
+        return mask
+
+    def stats(self) -> dict:
+        with self._lock:
+            raw = sum(f.size[0] * f.size[1] * 3 for f in self.frames)
+            return {
+                "frames": len(self.frames),
+                "tiles": len(self._tiles),
+                "bytes": self.memory_bytes,
+                "raw_bytes": raw,
+                "span_s": self.frames[-1].timestamp - self.frames[0].timestamp
+                if self.frames
+                else 0.0,
+            }
+
+    def clear(self):
+        with self._lock:
+            self.frames.clear()
+            self._tiles.clear()
+            self._tile_bytes = 0
+            self._last = None
+
+
+class FrameHistories:
+    """One ``FrameHistory`` per capture target, under a shared memory ceiling.
+
+    Frames of different targets never share tiles, and comparing them makes
+    no sense, so each target keeps its own history; switching targets and
+    back finds the earlier frames still there. When the histories together
+    exceed ``max_bytes``, the oldest frame of any target goes first, and a
+    target other than the one just recorded may lose its history entirely.
+    """
+
+    def __init__(self, max_bytes: int = 64 * 1024 * 1024, max_frames: int = 600, tile: int = 64):
+        self.max_bytes = max_bytes
+        self.max_frames = max_frames
+        self.tile = tile
+        self.histories = {}  # target -> FrameHistory
+        self._lock = threading.Lock()
+
+    def get(self, target) -> FrameHistory:
+        """The history of ``target``, created empty if there is none yet."""
+        with self._lock:
+            history = self.histories.get(target)
+            if history is None:
+                history = self.histories[target] = FrameHistory(
+                    self.max_bytes, self.max_frames, self.tile
+                )
+            return history
+
+    def add(self, target, image: Image.Image, timestamp: float = None) -> HistoryFrame:
+        history = self.get(target)
+        frame = history.add(image, timestamp)
+        with self._lock:
+            self._evict(history)
+        return frame
+
+    @property
+    def memory_bytes(self) -> int:
+        return sum(history.memory_bytes for history in list(self.histories.values()))
+
+    def _evict(self, keep: FrameHistory):
+        while self.memory_bytes > self.max_bytes:
+            candidates = [
+                (target, history)
+                for target, history in self.histories.items()
+                if history.frames and (history is not keep or len(history.frames) > 1)
+            ]
+            if not candidates:
+                return
+            target, history = min(candidates, key=lambda item: item[1].frames[0].timestamp)
+            if not history.drop_oldest():
+                del self.histories[target]
+
+    def stats(self) -> dict:
+        with self._lock:
+            histories = list(self.histories.items())
+        return {target: history.stats() for target, history in histories}
+
+    def clear(self):
+        with self._lock:
+            self.histories.clear()
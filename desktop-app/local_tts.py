@@ -0,0 +1,259 @@
+"""Offline pyttsx3 speech hosted in a long-lived worker process.
+
+``runAndWait`` blocks whichever thread calls it, and ``engine.stop()`` from
+another thread is unreliable on most drivers. Here the engine lives in a child
+process that initializes it once, speaks a short warm-up utterance at zero
+volume, and then drives pyttsx3's external event loop while reading commands
+from a pipe. The parent queues sentence-sized utterances by priority, can
+interrupt the current one at any time, and gets start/finish events back for
+per-utterance timing.
+"""
+
+import heapq
+import itertools
+import multiprocessing
+import threading
+import time
+
+from engine import PRIORITY_INTERACTIVE
+from metrics import Metrics
+
+
+def _worker_main(conn, rate: int, volume: float):
+    """Child process: own the pyttsx3 engine and serve commands from ``conn``."""
+    try:
+        import pyttsx3
+
+        engine = pyttsx3.init()
+        voices = engine.getProperty("voices")
+        if voices:
+            engine.setProperty("voice", voices[0].id)
+        engine.setProperty("rate", rate)
+        # Prime the driver (voice data, audio device) with a silent utterance
+        engine.setProperty("volume", 0.0)
+        started = time.perf_counter()
+        engine.say("ready", "warm-up")
+        engine.runAndWait()
+        engine.setProperty("volume", volume)
+        warm_up_s = time.perf_counter() - started
+
+        def on_start(name):
+            if name != "warm-up":
+                conn.send(("started", name, time.time()))
+
+        def on_finish(name, completed):
+            if name != "warm-up":
+                conn.send(("finished", name, time.time(), completed))
+
+        engine.connect("started-utterance", on_start)
+        engine.connect("finished-utterance", on_finish)
+        engine.startLoop(False)
+    except Exception as e:
+        conn.send(("error", f"Could not start pyttsx3: {e}"))
+        return
+    conn.send(("ready", warm_up_s))
+
+    try:
+        while True:
+            engine.iterate()
+            # Waits on the pipe; the timeout keeps the driver's loop turning
+            if not conn.poll(0.01):
+                continue
+            command = conn.recv()
+            if command[0] == "say":
+                _, utterance_id, text = command
+                engine.say(text, utterance_id)
+            elif command[0] == "stop":
+                engine.stop()
+                conn.send(("stopped", command[1]))
+            elif command[0] == "quit":
+                break
+    except (EOFError, OSError):
+        pass  # The parent went away
+    finally:
+        engine.endLoop()
+
+
+class Utterance:
+    def __init__(self, text: str, priority: int, sequence: int):
+        self.id = f"u{sequence}"
+        self.text = text
+        self.priority = priority
+        self.sequence = sequence
+        self.state = "queued"
+        self.queued_at = time.time()
+        self.started_at = None
+        self.finished_at = None
+        self.done = threading.Event()
+
+    def __lt__(self, other):
+        return (self.priority, self.sequence) < (other.priority, other.sequence)
+
+    @property
+    def latency(self):
+        """Seconds from being queued until speech started."""
+        return self.started_at - self.queued_at if self.started_at else None
+
+    @property
+    def duration(self):
+        if self.started_at and self.finished_at:
+            return self.finished_at - self.started_at
+        return None
+
+    def wait(self, timeout: float = None) -> bool:
+        return self.done.wait(timeout)
+
+    def _finish(self, state: str):
+        self.state = state
+        self.finished_at = self.finished_at or time.time()
+        self.done.set()
+
+
+class LocalSpeechWorker:
+    """Speaks utterances one at a time in a prewarmed pyttsx3 process.
+
+    Lower ``priority`` values are more urgent: queuing a more urgent utterance
+    interrupts a less urgent one that is being spoken and discards it. Timing
+    of every utterance is recorded as the ``local_tts_start`` (queue to first
+    sound) and ``local_tts_speak`` stages.
+    """
+
+    def __init__(self, rate: int = 160, volume: float = 0.9, metrics=None, log=print):
+        self.rate = rate
+        self.volume = volume
+        self.metrics = metrics or Metrics()
+        self.log = log
+        self.ready = threading.Event()
+        self.error = None
+        self._pending = []
+        self._current = None
+        self._counter = itertools.count()
+        self._lock = threading.Lock()
+        self._process = None
+        self._conn = None
+
+    def start(self) -> "LocalSpeechWorker":
+        """Launch the worker process; it warms up in the background."""
+        ctx = multiprocessing.get_context("spawn")
+        self._conn, child = ctx.Pipe()
+        self._process = ctx.Process(
+            target=_worker_main,
+            args=(child, self.rate, self.volume),
+            name="pyttsx3-worker",
+            daemon=True,
+        )
+        self._process.start()
+        child.close()
+        threading.Thread(target=self._listen, name="pyttsx3-events", daemon=True).start()
+        return self
+
+    def speak(self, text: str, priority: int = PRIORITY_INTERACTIVE) -> Utterance:
+        """Queue one utterance (ideally a sentence) and return it at once."""
+        if self.error:
+            raise RuntimeError(self.error)
+        with self._lock:
+            utterance = Utterance(text, priority, next(self._counter))
+            heapq.heappush(self._pending, utterance)
+            current = self._current
+            preempt = current is not None and priority < current.priority
+        if preempt:
+            current.state = "preempted"
+            self._send(("stop", current.id))
+        else:
+            self._dispatch()
+        return utterance
+
+    def stop(self, priority: int = None):
+        """Interrupt speech and drop queued utterances (of ``priority`` or
+        less urgent ones, if given)."""
+        with self._lock:
+            keep = [u for u in self._pending if priority is not None and u.priority < priority]
+            dropped = [u for u in self._pending if u not in keep]
+            self._pending = keep
+            heapq.heapify(self._pending)
+            current = self._current
+        for utterance in dropped:
+            utterance._finish("cancelled")
+        if current is not None and (priority is None or current.priority >= priority):
+            current.state = "cancelled"
+            self._send(("stop", current.id))
+
+    def _send(self, command):
+        try:
+            self._conn.send(command)
+        except (OSError, AttributeError) as e:
+            self.log(f"pyttsx3 worker is not running: {e}")
+
+    def _dispatch(self):
+        """Hand the most urgent queued utterance to the worker if it is idle."""
+        if not self.ready.is_set():
+            return
+        with self._lock:
+            if self._current is not None or not self._pending:
+                return
+            self._current = heapq.heappop(self._pending)
+            utterance = self._current
+        self._send(("say", utterance.id, utterance.text))
+
+    def _listen(self):
+        while True:
+            try:
+                event = self._conn.recv()
+            except (EOFError, OSError):
+                break
+            kind = event[0]
+            if kind == "ready":
+                self.metrics.record("local_tts_warm_up", event[1])
+                self.ready.set()
+                self._dispatch()
+            elif kind == "error":
+                self.error = event[1]
+                self.log(self.error)
+                self.ready.set()
+                break
+            elif kind == "started":
+                current = self._current
+                if current is not None and current.id == event[1]:
+                    current.started_at = event[2]
+                    current.state = "speaking"
+                    self.metrics.record("local_tts_start", current.latency)
+            elif kind in ("finished", "stopped"):
+                self._finish_current(event)
+        if not self.ready.is_set():
+            self.error = "The pyttsx3 worker exited while starting up."
+            self.ready.set()
+        with self._lock:
+            pending, self._pending = self._pending, []
+            current, self._current = self._current, None
+        for utterance in pending + ([current] if current else []):
+            utterance._finish("cancelled")
+
+    def _finish_current(self, event):
+        kind, utterance_id = event[0], event[1]
+        with self._lock:
+            current = self._current
+            if current is None or current.id != utterance_id:
+                return
+            self._current = None
+        completed = kind == "finished" and event[3]
+        if kind == "finished":
+            current.finished_at = event[2]
+        if current.state in ("cancelled", "preempted"):
+            current._finish(current.state)
+        elif completed:
+            current._finish("done")
+            if current.duration is not None:
+                self.metrics.record("local_tts_speak", current.duration)
+        else:
+            current._finish("cancelled")
+        self._dispatch()
+
+    def close(self):
+        self.stop()
+        self._send(("quit",))
+        if self._process is not None:
+            self._process.join(timeout=2)
+            if self._process.is_alive():
+                self._process.terminate()
+        if self._conn is not None:
+            self._conn.close()
@@ -0,0 +1,112 @@
+"""Per-stage latency spans aggregated into percentile histograms."""
+
+import json
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+
+QUANTILES = (0.5, 0.95, 0.99)
+
+
+class Histogram:
+    """Keeps the most recent samples of one stage for percentile estimates."""
+
+    def __init__(self, max_samples: int = 2048):
+        self.samples = deque(maxlen=max_samples)
+        self.count = 0
+        self.total = 0.0
+
+    def add(self, seconds: float):
+        self.samples.append(seconds)
+        self.count += 1
+        self.total += seconds
+
+    def quantile(self, q: float) -> float:
+        if not self.samples:
+            return 0.0
+        ordered = sorted(self.samples)
+        index = min(len(ordered) - 1, max(0, round(q * (len(ordered) - 1))))
+        return ordered[index]
+
+
+class Metrics:
+    """Thread-safe registry of stage timings.
+
+    Wrap a stage in ``with metrics.span("analyze"):`` or report a measured
+    duration with ``record``. ``snapshot`` returns p50/p95/p99 per stage, and
+    ``to_json`` / ``to_prometheus`` export it.
+    """
+
+    def __init__(self, max_samples: int = 2048):
+        self.max_samples = max_samples
+        self._histograms = {}
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def span(self, stage: str):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(stage, time.perf_counter() - start)
+
+    def record(self, stage: str, seconds: float):
+        with self._lock:
+            histogram = self._histograms.get(stage)
+            if histogram is None:
+                histogram = self._histograms[stage] = Histogram(self.max_samples)
+            histogram.add(seconds)
+
+    def quantile(self, stage: str, q: float, min_samples: int = 1):
+        """Latest ``q`` quantile of a stage, or None with too few samples."""
+        with self._lock:
+            histogram = self._histograms.get(stage)
+            if histogram is None or len(histogram.samples) < min_samples:
+                return None
+            return histogram.quantile(q)
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {
+                stage: {
+                    "count": h.count,
+                    "sum": h.total,
+                    **{f"p{int(q * 100)}": h.quantile(q) for q in QUANTILES},
+                }
+                for stage, h in self._histograms.items()
+            }
+
+    def to_json(self) -> str:
+        return json.dumps(self.snapshot(), indent=2, sort_keys=True)
+
+    def to_prometheus(self, prefix: str = "screen_reader_stage_seconds") -> str:
+        lines = [
+            f"# HELP {prefix} Latency of screen reader pipeline stages.",
+            f"# TYPE {prefix} summary",
+        ]
+        for stage, values in sorted(self.snapshot().items()):
+            for q in QUANTILES:
+                value = values[f"p{int(q * 100)}"]
+                lines.append(f'{prefix}{{stage="{stage}",quantile="{q}"}} {value:.6f}')
+            lines.append(f'{prefix}_sum{{stage="{stage}"}} {values["sum"]:.6f}')
+            lines.append(f'{prefix}_count{{stage="{stage}"}} {values["count"]}')
+        return "\n".join(lines) + "\n"
+
+    def status_summary(self, stages=None) -> str:
+        """One-line p50/p95 summary in milliseconds, suitable for a status bar."""
+        snapshot = self.snapshot()
+        parts = []
+        for stage in stages or sorted(snapshot):
+            if stage in snapshot:
+                values = snapshot[stage]
+                parts.append(
+                    f"{stage} {values['p50'] * 1000:.0f}/{values['p95'] * 1000:.0f}ms"
+                )
+        return "p50/p95: " + ", ".join(parts) if parts else "No timings yet."
+
+    def export(self, path: str):
+        """Write the metrics to ``path``; ``.prom``/``.txt`` use Prometheus text."""
+        text = self.to_prometheus() if path.endswith((".prom", ".txt")) else self.to_json()
+        with open(path, "w") as f:
+            f.write(text)
@@ -0,0 +1,162 @@
+"""Concurrent Murf synthesis over a shared keep-alive HTTP session."""
+
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from metrics import Metrics
+from resilience import ResilientCaller
+
+
+class RateLimiter:
+    """Spaces out calls so no more than ``rate`` start per second."""
+
+    def __init__(self, rate: float):
+        self.interval = 1.0 / rate if rate else 0.0
+        self._next_slot = 0.0
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        with self._lock:
+            now = time.monotonic()
+            slot = max(now, self._next_slot)
+            self._next_slot = slot + self.interval
+        if slot > now:
+            time.sleep(slot - now)
+
+
+class AudioStream:
+    """Iterates the body of a Murf audio download as it arrives.
+
+    The complete audio is written to the cache once the download finishes.
+    """
+
+    def __init__(self, response, on_complete=None, block_size: int = 16384):
+        self.response = response
+        self.on_complete = on_complete
+        self.block_size = block_size
+
+    def __iter__(self):
+        data = bytearray()
+        try:
+            for block in self.response.iter_content(self.block_size):
+                data += block
+                yield block
+        finally:
+            self.response.close()
+        if self.on_complete:
+            self.on_complete(bytes(data))
+
+
+class MurfSynthesizer:
+    """Synthesizes and downloads text chunks on a bounded worker pool.
+
+    ``synthesize_all`` submits every chunk up front and yields the audio in
+    chunk order as soon as each one is ready, so the caller can start playing
+    chunk 1 while later chunks are still being generated. Chunks found in the
+    optional ``AudioCache`` are served without touching the network.
+
+    Each chunk (generate plus download) runs through ``caller``, which bounds
+    it with a deadline, retries transient failures and stops calling Murf
+    for a while once it keeps failing; check ``available`` before using it.
+    """
+
+    def __init__(
+        self,
+        client,
+        max_workers: int = 3,
+        requests_per_second: float = 2.0,
+        timeout=(5, 30),
+        cache=None,
+        metrics=None,
+        caller: ResilientCaller = None,
+    ):
+        self.client = client
+        self.cache = cache
+        self.metrics = metrics or Metrics()
+        self.timeout = timeout
+        self.caller = caller or ResilientCaller("murf", deadline=20.0, metrics=self.metrics)
+        self.rate_limiter = RateLimiter(requests_per_second)
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=max_workers, pool_maxsize=max_workers)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+        self.executor = ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix="murf"
+        )
+
+    @property
+    def available(self) -> bool:
+        return self.caller.available
+
+    def synthesize(self, text: str, voice_id: str, style: str = None) -> bytes:
+        audio = self.caller.call(self._request, text, voice_id)
+        if self.cache:
+            self.cache.put(text, voice_id, style, "murf", audio)
+        return audio
+
+    def _request(self, text: str, voice_id: str, stream=False):
+        self.rate_limiter.acquire()
+        with self.metrics.span("murf_generate"):
+            response = self.client.text_to_speech.generate(
+                text=text,
+                voice_id=voice_id,
+                request_options={"timeout_in_seconds": self.timeout[1]},
+            )
+        if not getattr(response, "audio_file", None):
+            raise RuntimeError("Murf returned no audio file.")
+        with self.metrics.span("murf_download"):
+            audio_response = self.session.get(
+                response.audio_file, timeout=self.timeout, stream=stream
+            )
+            audio_response.raise_for_status()
+        return audio_response if stream else audio_response.content
+
+    def open_stream(self, text: str, voice_id: str, style: str = None) -> AudioStream:
+        """Generate ``text`` and return its audio download without reading it."""
+        # A hedged duplicate would leave a second download open, so no hedging
+        response = self.caller.call(self._request, text, voice_id, stream=True, hedge=False)
+
+        def on_complete(audio):
+            if self.cache:
+                self.cache.put(text, voice_id, style, "murf", audio)
+
+        return AudioStream(response, on_complete)
+
+    def synthesize_all(
+        self, chunks: list, voice_id: str, style: str = None, stream_first=False
+    ):
+        """Yield each chunk's audio in order.
+
+        With ``stream_first``, an uncached first chunk is yielded as an
+        ``AudioStream`` so playback can begin before its download completes.
+        """
+        pending = []
+        for i, chunk in enumerate(chunks):
+            cached = self.cache.get(chunk, voice_id, style) if self.cache else None
+            if cached is not None:
+                pending.append(cached)
+            elif i == 0 and stream_first:
+                pending.append(
+                    self.executor.submit(self.open_stream, chunk, voice_id, style)
+                )
+            else:
+                pending.append(
+                    self.executor.submit(self.synthesize, chunk, voice_id, style)
+                )
+        try:
+            for item in pending:
+                yield item if isinstance(item, bytes) else item.result()
+        finally:
+            # Runs when playback stops early too; drop work that has not started.
+            for item in pending:
+                if not isinstance(item, bytes):
+                    item.cancel()
+
+    def close(self):
+        self.executor.shutdown(wait=False, cancel_futures=True)
+        self.caller.close()
+        self.session.close()
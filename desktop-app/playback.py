@@ -0,0 +1,242 @@
+"""Gapless, event-driven audio playback on a reserved pygame mixer channel.
+
+Chunks are decoded into ``pygame.mixer.Sound`` objects ahead of time, and each
+one is handed to ``Channel.queue`` while the previous one is still playing, so
+the mixer moves from one to the next without a gap. The output thread sleeps
+on an event until the sound ahead of it is due to finish instead of polling
+``get_busy()``, and stopping silences the channel and wakes it at once.
+
+Uncompressed WAV can be played while it is still downloading: pass an iterable
+of byte blocks instead of ``bytes`` and the PCM is cut into short sounds as it
+arrives.
+"""
+
+import io
+import struct
+import threading
+import time
+from array import array
+from collections import deque
+
+
+class WavFormat:
+    def __init__(self, audio_format, channels, rate, bits, data_offset):
+        self.audio_format = audio_format
+        self.channels = channels
+        self.rate = rate
+        self.bits = bits
+        self.data_offset = data_offset
+
+    @property
+    def frame_bytes(self) -> int:
+        return self.channels * self.bits // 8
+
+
+def parse_wav_header(data: bytes):
+    """Return the ``WavFormat`` of a WAV prefix, or None if more bytes are needed.
+
+    Raises ValueError if ``data`` is not a WAV file.
+    """
+    if len(data) < 12:
+        return None
+    if data[:4] != b"RIFF" or data[8:12] != b"WAVE":
+        raise ValueError("Not a WAV file.")
+    offset, fmt = 12, None
+    while offset + 8 <= len(data):
+        chunk_id = data[offset : offset + 4]
+        size = struct.unpack_from("<I", data, offset + 4)[0]
+        body = offset + 8
+        if chunk_id == b"data":
+            if fmt is None:
+                raise ValueError("WAV data chunk before its format chunk.")
+            return WavFormat(*fmt, body)
+        if chunk_id == b"fmt ":
+            if body + 16 > len(data):
+                return None
+            audio_format, channels, rate = struct.unpack_from("<HHI", data, body)
+            bits = struct.unpack_from("<H", data, body + 14)[0]
+            fmt = (audio_format, channels, rate, bits)
+        offset = body + size + (size & 1)
+    return None
+
+
+class _Output:
+    """Feeds decoded sounds to one channel, keeping at most one queued."""
+
+    def __init__(self, channel, on_start=None, lookahead: int = 3):
+        self.channel = channel
+        self.on_start = on_start
+        self.lookahead = lookahead
+        self.sounds = deque()
+        self.finished_input = False
+        self.stopped = threading.Event()
+        self.done = threading.Event()
+        self._cond = threading.Condition()
+        self._thread = threading.Thread(target=self._run, name="playback", daemon=True)
+        self._thread.start()
+
+    def put(self, sound) -> bool:
+        """Add a sound, waiting while ``lookahead`` sounds are already decoded."""
+        with self._cond:
+            while len(self.sounds) >= self.lookahead and not self.stopped.is_set():
+                self._cond.wait()
+            if self.stopped.is_set():
+                return False
+            self.sounds.append(sound)
+            self._cond.notify_all()
+            return True
+
+    def finish(self):
+        with self._cond:
+            self.finished_input = True
+            self._cond.notify_all()
+
+    def stop(self):
+        self.stopped.set()
+        self.channel.stop()
+        with self._cond:
+            self._cond.notify_all()
+
+    def _next(self):
+        with self._cond:
+            while not self.sounds and not self.finished_input and not self.stopped.is_set():
+                self._cond.wait()
+            if self.stopped.is_set() or not self.sounds:
+                return None
+            sound = self.sounds.popleft()
+            self._cond.notify_all()
+            return sound
+
+    def _wait_until(self, deadline: float) -> bool:
+        """Sleep until ``deadline``; True if stopped meanwhile."""
+        return self.stopped.wait(max(0.0, deadline - time.monotonic()))
+
+    def _run(self):
+        playing_until = 0.0  # When the sound on the channel ends
+        queued_until = None  # When the sound queued behind it ends
+        try:
+            while True:
+                sound = self._next()
+                if sound is None:
+                    break
+                if queued_until is not None:
+                    # Channel.queue holds a single sound: wait for it to start
+                    if self._wait_until(playing_until):
+                        return
+                    while self.channel.get_queue() is not None:
+                        # The mixer clock can lag ours by a buffer or so
+                        if self.stopped.wait(0.005):
+                            return
+                    playing_until, queued_until = queued_until, None
+                now = time.monotonic()
+                if now >= playing_until or not self.channel.get_busy():
+                    self.channel.play(sound)
+                    playing_until = now + sound.get_length()
+                    if self.on_start:
+                        self.on_start()
+                        self.on_start = None
+                else:
+                    self.channel.queue(sound)
+                    queued_until = playing_until + sound.get_length()
+            if not self.stopped.is_set():
+                self._wait_until(queued_until or playing_until)
+        finally:
+            self.done.set()
+
+
+class PlaybackEngine:
+    """Plays a sequence of audio chunks back to back on a reserved channel."""
+
+    def __init__(self, pygame, channel_id: int = 0, stream_block_s: float = 0.5):
+        self.pygame = pygame
+        pygame.mixer.set_reserved(channel_id + 1)
+        self.channel = pygame.mixer.Channel(channel_id)
+        self.stream_block_s = stream_block_s
+        self.mixer_rate, self.mixer_size, self.mixer_channels = pygame.mixer.get_init()
+
+    def play(self, audio_items, token=None, on_start=None) -> bool:
+        """Decode and play each item in order; returns False if stopped early.
+
+        Items are ``bytes`` of any format pygame can load, or iterables of
+        byte blocks (a WAV still being downloaded). Cancelling ``token``
+        silences playback immediately.
+        """
+        output = _Output(self.channel, on_start)
+        if token is not None:
+            token.on_cancel(output.stop)
+        try:
+            for item in audio_items:
+                for sound in self.decode(item):
+                    if not output.put(sound):
+                        break
+                if output.stopped.is_set():
+                    break
+            output.finish()
+            output.done.wait()
+        except BaseException:
+            output.stop()
+            raise
+        finally:
+            if token is not None:
+                token.remove_callback(output.stop)
+        return not output.stopped.is_set()
+
+    def decode(self, item):
+        """Yield the sounds for one chunk."""
+        if isinstance(item, (bytes, bytearray, memoryview)):
+            yield self.pygame.mixer.Sound(file=io.BytesIO(bytes(item)))
+        else:
+            yield from self._decode_stream(item)
+
+    def _streamable(self, fmt: WavFormat) -> bool:
+        return (
+            fmt.audio_format == 1
+            and fmt.bits == 16
+            and self.mixer_size == -16
+            and fmt.rate == self.mixer_rate
+            and fmt.channels in (1, self.mixer_channels)
+        )
+
+    def _decode_stream(self, blocks):
+        """Cut a downloading WAV into short sounds as the bytes come in.
+
+        Formats the mixer cannot take as raw PCM are buffered and decoded once
+        the download completes.
+        """
+        data = bytearray()
+        fmt, streaming, position = None, None, 0
+        for block in blocks:
+            data += block
+            if streaming is None:
+                try:
+                    fmt = parse_wav_header(data)
+                except ValueError:
+                    streaming = False
+                    continue
+                if fmt is None:
+                    continue
+                streaming = self._streamable(fmt)
+                position = fmt.data_offset
+                block_bytes = int(fmt.rate * self.stream_block_s) * fmt.frame_bytes
+            while streaming and len(data) - position >= block_bytes:
+                yield self._pcm_sound(data[position : position + block_bytes], fmt)
+                position += block_bytes
+        if streaming:
+            tail = len(data) - (len(data) - position) % fmt.frame_bytes
+            if tail > position:
+                yield self._pcm_sound(data[position:tail], fmt)
+        elif data:
+            yield self.pygame.mixer.Sound(file=io.BytesIO(bytes(data)))
+
+    def _pcm_sound(self, pcm: bytes, fmt: WavFormat):
+        # WAV samples are little-endian, as is every platform this runs on
+        if fmt.channels != self.mixer_channels:
+            mono = array("h", bytes(pcm))
+            interleaved = array("h", bytes(len(pcm) * self.mixer_channels))
+            for channel in range(self.mixer_channels):
+                interleaved[channel :: self.mixer_channels] = mono
+            pcm = interleaved.tobytes()
+        return self.pygame.mixer.Sound(buffer=bytes(pcm))
+
+    def stop(self):
+        self.channel.stop()
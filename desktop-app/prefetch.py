@@ -0,0 +1,208 @@
+"""Speculative analysis of the foreground window before the user asks for it."""
+
+import threading
+import time
+from collections import OrderedDict
+
+from engine import PRIORITY_PREFETCH
+from frame_diff import content_hash
+from watch import CallBudget
+
+
+class PrefetchCache:
+    """Small LRU of prefetched analyses, one per window handle.
+
+    An entry only answers for its window while the window's pixels are
+    exactly the same, i.e. while its ``content_hash`` is unchanged.
+    """
+
+    def __init__(self, max_entries: int = 8):
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()  # hwnd -> (content hash, analysis)
+        self._lock = threading.Lock()
+
+    def get(self, hwnd, key: str):
+        with self._lock:
+            entry = self._entries.get(hwnd)
+            if entry is not None and entry[0] == key:
+                self._entries.move_to_end(hwnd)
+                self.hits += 1
+                return entry[1]
+            self.misses += 1
+            return None
+
+    def covers(self, hwnd, key: str) -> bool:
+        """Whether ``get`` would hit, without counting it."""
+        with self._lock:
+            entry = self._entries.get(hwnd)
+            return entry is not None and entry[0] == key
+
+    def put(self, hwnd, key: str, analysis: str):
+        with self._lock:
+            self._entries[hwnd] = (key, analysis)
+            self._entries.move_to_end(hwnd)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+class ForegroundTracker:
+    """Remembers the last window other than the agent's own to have the focus.
+
+    Clicking one of the agent's buttons focuses the agent, so by the time a
+    read runs, the window the user meant is no longer in the foreground. The
+    foreground window is polled every ``poll_interval`` seconds to keep track
+    of it. Backends without window capture have no foreground window.
+    """
+
+    def __init__(self, agent, poll_interval: float = 0.25):
+        self.agent = agent
+        self.poll_interval = poll_interval
+        self.window = None
+        self._stop = threading.Event()
+        self._thread = None
+
+    @property
+    def running(self) -> bool:
+        return (
+            self._thread is not None
+            and self._thread.is_alive()
+            and not self._stop.is_set()
+        )
+
+    def start(self):
+        if self.running:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="foreground-tracker", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+
+    def current(self):
+        """The window a read should capture: the foreground window, or the
+        last other one while the agent itself has the focus."""
+        backend = self.agent.capture_backend
+        hwnd = backend.foreground_window()
+        if hwnd is not None and not backend.owns_window(hwnd):
+            self.window = hwnd
+        return self.window
+
+    @property
+    def supported(self) -> bool:
+        return self.agent.capture_backend.supports_windows
+
+    def _run(self):
+        while not self._stop.wait(self.poll_interval):
+            try:
+                if not self.supported:
+                    break
+                self.current()
+            except Exception as e:
+                self.agent.log_status(f"Focus tracking error: {e}")
+
+
+class WindowPrefetcher:
+    """Analyzes the foreground window in the background once it settles.
+
+    The foreground window is polled every ``poll_interval`` seconds. Once the
+    same window has held the focus for ``stable_s`` seconds it is captured,
+    and analyzed at prefetch priority unless the cache already holds an
+    analysis of exactly these pixels. While it keeps the focus it is captured
+    again every ``recheck_s`` seconds in case its content changed. Analyses
+    never exceed ``max_calls_per_minute``, and only one runs at a time. The
+    agent's own windows are skipped: while one of them has the focus, the
+    window before it (see ``ForegroundTracker``) is still the one prefetched,
+    since that is the window "Read Active Window" reads.
+
+    Interactive requests cancel a running analysis (see
+    ``AIScreenReaderAgent.make_room_for_interactive``) rather than wait for a
+    worker behind it.
+    """
+
+    def __init__(
+        self,
+        agent,
+        cache: PrefetchCache,
+        poll_interval: float = 0.25,
+        stable_s: float = 1.0,
+        recheck_s: float = 5.0,
+        max_calls_per_minute: int = 4,
+    ):
+        self.agent = agent
+        self.cache = cache
+        self.poll_interval = poll_interval
+        self.stable_s = stable_s
+        self.recheck_s = recheck_s
+        self.budget = CallBudget(max_calls_per_minute)
+        self.job = None
+        self._stop = threading.Event()
+        self._thread = None
+
+    @property
+    def running(self) -> bool:
+        return (
+            self._thread is not None
+            and self._thread.is_alive()
+            and not self._stop.is_set()
+        )
+
+    def start(self):
+        if self.running:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="window-prefetch", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self.job is not None:
+            self.job.cancel()
+
+    def _run(self):
+        window, since, checked = None, 0.0, 0.0
+        while not self._stop.wait(self.poll_interval):
+            try:
+                hwnd = self.agent.foreground.current()
+            except Exception as e:
+                self.agent.log_status(f"Prefetch error: {e}")
+                continue
+            if not self.agent.foreground.supported:
+                self.agent.log_status("Prefetch needs window capture, which is only available on Windows.")
+                break
+            if hwnd is None:
+                continue
+            now = time.monotonic()
+            if hwnd != window:
+                window, since, checked = hwnd, now, 0.0
+                continue
+            if now - since < self.stable_s or now - checked < self.recheck_s:
+                continue
+            if self.job is not None and not self.job.done:
+                continue
+            checked = now
+            self.job = self.agent.engine.submit(
+                "prefetch-window",
+                self._prefetch,
+                hwnd,
+                priority=PRIORITY_PREFETCH,
+                key=("prefetch", hwnd),
+            )
+
+    def _prefetch(self, hwnd, token=None):
+        if self.agent.foreground.current() != hwnd:
+            return  # The focus moved on while the job was queued
+        image = self.agent.capture_active_window(hwnd)
+        key = content_hash(image)
+        if self.cache.covers(hwnd, key) or not self.budget.try_acquire():
+            return
+        token.raise_if_cancelled()
+        analysis = self.agent.prefetch_analysis(image, token)
+        if analysis and not token.cancelled:
+            self.cache.put(hwnd, key, analysis)
@@ -0,0 +1,163 @@
+"""Shrinks screenshots before they are uploaded to the vision model."""
+
+import io
+import math
+import time
+
+from PIL import Image, ImageChops
+
+# Gemini bills images in 768x768 tiles of 258 tokens each.
+GEMINI_TILE_PX = 768
+GEMINI_TOKENS_PER_TILE = 258
+
+
+def estimate_image_tokens(width: int, height: int) -> int:
+    tiles = math.ceil(width / GEMINI_TILE_PX) * math.ceil(height / GEMINI_TILE_PX)
+    return tiles * GEMINI_TOKENS_PER_TILE
+
+
+class PreprocessResult:
+    def __init__(self, data, mime_type, size, crop_box, raw_bytes, encode_ms):
+        self.data = data
+        self.mime_type = mime_type
+        self.size = size
+        self.crop_box = crop_box
+        self.raw_bytes = raw_bytes
+        self.encode_ms = encode_ms
+
+    @property
+    def encoded_bytes(self) -> int:
+        return len(self.data)
+
+    @property
+    def bytes_saved(self) -> int:
+        return self.raw_bytes - self.encoded_bytes
+
+    @property
+    def estimated_tokens(self) -> int:
+        return estimate_image_tokens(*self.size)
+
+    def as_blob(self) -> dict:
+        """Inline image part accepted by ``GenerativeModel.generate_content``."""
+        return {"mime_type": self.mime_type, "data": self.data}
+
+    def summary(self) -> str:
+        return (
+            f"{self.size[0]}x{self.size[1]} {self.mime_type.split('/')[-1]}, "
+            f"{self.encoded_bytes / 1024:.0f} KB ({self.bytes_saved / 1024:.0f} KB saved), "
+            f"encoded in {self.encode_ms:.0f} ms"
+        )
+
+
+class ImagePreprocessor:
+    """Crop, downscale and re-encode a screenshot.
+
+    ``max_pixels`` caps the pixel count and ``max_tokens`` caps the estimated
+    image-token cost; whichever is tighter wins. The taskbar is only ever
+    trimmed from full-screen captures, which pass the ``work_area`` their
+    backend reports: with ``strip_taskbar`` the image is cropped to it.
+    ``taskbar_px`` instead trims a fixed band off the bottom, for backends
+    that cannot tell where the taskbar is.
+    """
+
+    def __init__(
+        self,
+        max_pixels: int = 1_600_000,
+        max_tokens: int = None,
+        image_format: str = "JPEG",
+        quality: int = 80,
+        grayscale: bool = False,
+        crop_borders: bool = True,
+        border_tolerance: int = 12,
+        taskbar_px: int = 0,
+        strip_taskbar: bool = True,
+    ):
+        self.max_pixels = max_pixels
+        self.max_tokens = max_tokens
+        self.image_format = image_format.upper()
+        self.quality = quality
+        self.grayscale = grayscale
+        self.crop_borders = crop_borders
+        self.border_tolerance = border_tolerance
+        self.taskbar_px = taskbar_px
+        self.strip_taskbar = strip_taskbar
+
+    def process(self, image: Image.Image, work_area=None) -> PreprocessResult:
+        """Preprocess one image. ``work_area`` is only given for full-screen
+        captures: the box of the screen not covered by the taskbar, or the
+        whole image if the backend does not know."""
+        start = time.perf_counter()
+        raw_bytes = image.width * image.height * len(image.getbands())
+
+        crop_box = (0, 0, image.width, image.height)
+        if work_area is not None:
+            crop_box = self.taskbar_crop(image.size, work_area)
+            if crop_box != (0, 0, image.width, image.height):
+                image = image.crop(crop_box)
+        if self.crop_borders:
+            bbox = self.content_bbox(image)
+            if bbox and bbox != (0, 0, image.width, image.height):
+                image = image.crop(bbox)
+                crop_box = (
+                    crop_box[0] + bbox[0],
+                    crop_box[1] + bbox[1],
+                    crop_box[0] + bbox[2],
+                    crop_box[1] + bbox[3],
+                )
+
+        image = image.convert("L" if self.grayscale else "RGB")
+        scale = self.target_scale(image.width, image.height)
+        if scale < 1.0:
+            size = (
+                max(1, int(image.width * scale)),
+                max(1, int(image.height * scale)),
+            )
+            image = image.resize(size, Image.LANCZOS)
+
+        buffer = io.BytesIO()
+        if self.image_format == "PNG":
+            image.save(buffer, "PNG", optimize=False)
+        else:
+            image.save(buffer, self.image_format, quality=self.quality)
+        encode_ms = (time.perf_counter() - start) * 1000
+        return PreprocessResult(
+            buffer.getvalue(),
+            f"image/{self.image_format.lower()}",
+            image.size,
+            crop_box,
+            raw_bytes,
+            encode_ms,
+        )
+
+    def content_bbox(self, image: Image.Image):
+        """Bounding box of everything that differs from the corner colour."""
+        rgb = image.convert("RGB")
+        background = Image.new("RGB", rgb.size, rgb.getpixel((0, 0)))
+        diff = ImageChops.difference(rgb, background).convert("L")
+        mask = diff.point(lambda v: 255 if v > self.border_tolerance else 0)
+        return mask.getbbox()
+
+    def taskbar_crop(self, size, work_area):
+        """The part of a full-screen capture to keep once the taskbar is gone."""
+        width, height = size
+        if self.taskbar_px and height > self.taskbar_px * 4:
+            return (0, 0, width, height - self.taskbar_px)
+        left, top, right, bottom = work_area
+        box = (max(0, left), max(0, top), min(width, right), min(height, bottom))
+        if not self.strip_taskbar or box[2] - box[0] < width // 2 or box[3] - box[1] < height // 2:
+            # Stripping is off, or the work area does not belong to this capture
+            return (0, 0, width, height)
+        return box
+
+    def target_scale(self, width: int, height: int) -> float:
+        scale = 1.0
+        if self.max_pixels and width * height > self.max_pixels:
+            scale = math.sqrt(self.max_pixels / (width * height))
+        if self.max_tokens:
+            while (
+                scale > 0.1
+                and estimate_image_tokens(int(width * scale), int(height * scale))
+                > self.max_tokens
+            ):
+                scale *= 0.9
+        return scale
@@ -0,0 +1,55 @@
+"""Prompts shared by the GUI agent and the headless tools."""
+
+import re
+
+_ANSWER_MARKER = re.compile(r"^\s*\**\[(\d+)\]\**[ \t]*", re.MULTILINE)
+
+SYSTEM_PROMPT = """You are an intelligent screen reading assistant. Your job is to:
+1. Analyze screen content and provide intelligent summaries
+2. Answer questions about what's on screen
+3. Identify key information, actionable items, and important elements
+4. Be conversational, helpful, and concise. Focus on what's most important or relevant."""
+
+
+def build_analysis_prompt(
+    system_prompt: str, user_query: str = None, history: str = None
+) -> str:
+    prompt_text = f"{system_prompt}\n\n"
+    if history:
+        prompt_text += f"Conversation so far:\n{history}\n\n"
+    if user_query:
+        prompt_text += f'Analyze this screen image and answer the user\'s question: "{user_query}"'
+    else:
+        prompt_text += "Analyze this screen image and provide an intelligent summary of its content and interactive elements."
+    return prompt_text
+
+
+def build_batch_prompt(system_prompt: str, questions: list, history: str = None) -> str:
+    """Ask several questions about one screen image in a single request."""
+    prompt_text = f"{system_prompt}\n\n"
+    if history:
+        prompt_text += f"Conversation so far:\n{history}\n\n"
+    prompt_text += "Analyze this screen image and answer each of the user's questions:\n"
+    prompt_text += "\n".join(f'[{i}] "{q}"' for i, q in enumerate(questions, 1))
+    prompt_text += (
+        "\n\nAnswer every question separately and in order. Start each answer on "
+        "a new line with the question's number in square brackets, like [1], and "
+        "write nothing before the first answer."
+    )
+    return prompt_text
+
+
+def split_batch_answers(text: str, count: int) -> list:
+    """Split a reply to ``build_batch_prompt`` into ``count`` answers.
+
+    Questions the reply has no (or an empty) numbered section for get None.
+    """
+    answers = [None] * count
+    markers = list(_ANSWER_MARKER.finditer(text))
+    for marker, following in zip(markers, markers[1:] + [None]):
+        index = int(marker.group(1)) - 1
+        end = following.start() if following else len(text)
+        answer = text[marker.end() : end].strip()
+        if 0 <= index < count and answer and answers[index] is None:
+            answers[index] = answer
+    return answers
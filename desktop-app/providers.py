@@ -0,0 +1,124 @@
+"""Lazily imported and initialized backends (LLM, TTS, audio, capture).
+
+Importing google.generativeai, murf, pyttsx3 and pygame and initializing them
+takes seconds on a cold start. The registry defers each of those costs until
+the provider is first used, or until ``warm_up`` loads it in the background
+once the window is already on screen.
+"""
+
+import threading
+
+
+class ProviderRegistry:
+    """Creates each registered provider once, on first ``get``.
+
+    Factories are plain callables that do their own imports. Creation is
+    serialized per provider, so a background warm-up and a click racing for
+    the same provider share one instance.
+    """
+
+    def __init__(self, log=print):
+        self.log = log
+        self._factories = {}
+        self._instances = {}
+        self._locks = {}
+        self._lock = threading.Lock()
+
+    def register(self, name: str, factory):
+        """Register (or replace) a factory; any existing instance is dropped."""
+        with self._lock:
+            self._factories[name] = factory
+            self._locks.setdefault(name, threading.Lock())
+            old = self._instances.pop(name, None)
+        _close(old)
+
+    def set(self, name: str, instance):
+        """Install a ready-made instance, e.g. a stand-in in benchmarks."""
+        with self._lock:
+            self._locks.setdefault(name, threading.Lock())
+            old = self._instances.get(name)
+            self._instances[name] = instance
+        if old is not instance:
+            _close(old)
+
+    def loaded(self, name: str) -> bool:
+        return name in self._instances
+
+    def peek(self, name: str):
+        """Return the instance if it exists, without creating it."""
+        return self._instances.get(name)
+
+    def get(self, name: str):
+        """Return the provider, creating it on first use. Raises on failure."""
+        if name in self._instances:
+            return self._instances[name]
+        with self._lock:
+            lock = self._locks.get(name)
+        if lock is None:
+            return None
+        with lock:
+            if name not in self._instances:
+                factory = self._factories.get(name)
+                if factory is None:
+                    return None
+                self._instances[name] = factory()
+            return self._instances[name]
+
+    def warm_up(self, names, on_done=None) -> threading.Thread:
+        """Create the named providers on a background thread."""
+
+        def run():
+            for name in names:
+                try:
+                    self.get(name)
+                except Exception as e:
+                    self.log(f"Could not warm up {name}: {e}")
+            if on_done:
+                on_done()
+
+        thread = threading.Thread(target=run, name="provider-warmup", daemon=True)
+        thread.start()
+        return thread
+
+    def close_all(self):
+        with self._lock:
+            instances, self._instances = list(self._instances.values()), {}
+        for instance in instances:
+            _close(instance)
+
+
+def _close(instance):
+    close = getattr(instance, "close", None)
+    if callable(close):
+        try:
+            close()
+        except Exception:
+            pass
+
+
+def create_gemini_model(api_key: str, model_name: str = "gemini-1.5-flash"):
+    import google.generativeai as genai
+
+    genai.configure(api_key=api_key)
+    return genai.GenerativeModel(model_name)
+
+
+def create_local_speech(rate: int = 160, volume: float = 0.9, metrics=None, log=print):
+    """Start the pyttsx3 worker process; it prewarms the engine in the background."""
+    from local_tts import LocalSpeechWorker
+
+    return LocalSpeechWorker(rate, volume, metrics=metrics, log=log).start()
+
+
+def create_murf_client(api_key: str):
+    from murf import Murf
+
+    return Murf(api_key=api_key)
+
+
+def create_audio_mixer():
+    """Initialize pygame's mixer and return the pygame module."""
+    import pygame
+
+    pygame.mixer.init()
+    return pygame
@@ -0,0 +1,66 @@
+"""Micro-batching of questions asked about the screen in quick succession."""
+
+import threading
+
+
+class QuestionBatcher:
+    """Collects questions and hands them to ``dispatch`` in batches.
+
+    A question waits at most ``window_s`` for others to join it. Questions
+    that arrive while an earlier batch is still being answered are held until
+    it finishes and then sent together, so a burst of questions costs one
+    capture and one request instead of one each. ``dispatch(questions)`` must
+    arrange for ``done()`` to be called once the batch has been answered.
+    """
+
+    def __init__(self, dispatch, window_s: float = 0.3, max_questions: int = 5):
+        self.dispatch = dispatch
+        self.window_s = window_s
+        self.max_questions = max_questions
+        self.busy = False
+        self._pending = []
+        self._timer = None
+        self._lock = threading.Lock()
+
+    def add(self, question: str):
+        with self._lock:
+            self._pending.append(question)
+            if self.busy or self._timer is not None:
+                ready = len(self._pending) >= self.max_questions and not self.busy
+            else:
+                ready = self.window_s <= 0
+                if not ready:
+                    self._timer = threading.Timer(self.window_s, self.flush)
+                    self._timer.daemon = True
+                    self._timer.start()
+        if ready:
+            self.flush()
+
+    def flush(self):
+        with self._lock:
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+            if self.busy or not self._pending:
+                return
+            batch = self._pending[: self.max_questions]
+            self._pending = self._pending[self.max_questions :]
+            self.busy = True
+        try:
+            self.dispatch(batch)
+        except Exception:
+            self.done()
+            raise
+
+    def done(self):
+        """Mark the current batch answered and send whatever queued up meanwhile."""
+        with self._lock:
+            self.busy = False
+        self.flush()
+
+    def clear(self):
+        with self._lock:
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+            self._pending = []
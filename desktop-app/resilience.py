@@ -0,0 +1,240 @@
+"""Deadlines, retries, circuit breaking and hedging for Gemini and Murf calls.
+
+Every remote call goes through a ``ResilientCaller``. The call runs on a small
+worker pool so the caller can stop waiting at its deadline even when the
+underlying client has no timeout of its own. The abandoned worker finishes
+(or times out) in the background; pass the client's own timeout as well where
+it has one so that worker is released too.
+"""
+
+import random
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+from engine import JobCancelled
+from metrics import Metrics
+
+
+class DeadlineExceeded(TimeoutError):
+    """The call did not finish within its deadline."""
+
+
+class CircuitOpen(RuntimeError):
+    """The service failed repeatedly and calls are being refused for now."""
+
+
+# Exception class names (from requests, google.api_core, httpx) worth retrying
+TRANSIENT_ERRORS = {
+    "Timeout",
+    "ConnectTimeout",
+    "ReadTimeout",
+    "ConnectionError",
+    "ServiceUnavailable",
+    "ResourceExhausted",
+    "InternalServerError",
+    "TooManyRequests",
+    "DeadlineExceeded",
+    "RemoteProtocolError",
+}
+
+
+def is_transient(error: BaseException) -> bool:
+    """True for timeouts, dropped connections, 429s and 5xx responses."""
+    if isinstance(error, (TimeoutError, ConnectionError)):
+        return True
+    status = getattr(error, "status_code", None) or getattr(
+        getattr(error, "response", None), "status_code", None
+    )
+    if isinstance(status, int) and (status == 429 or status >= 500):
+        return True
+    return any(cls.__name__ in TRANSIENT_ERRORS for cls in type(error).__mro__)
+
+
+class RetryPolicy:
+    """Exponential backoff with full jitter."""
+
+    def __init__(
+        self, attempts: int = 3, base_delay: float = 0.5, max_delay: float = 8.0,
+        retryable=is_transient,
+    ):
+        self.attempts = attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.retryable = retryable
+
+    def delay(self, attempt: int) -> float:
+        """Seconds to wait before retry number ``attempt + 1``."""
+        return random.uniform(0, min(self.max_delay, self.base_delay * 2**attempt))
+
+
+class CircuitBreaker:
+    """Refuses calls for ``reset_timeout`` seconds after repeated failures.
+
+    Once the timeout has passed, a single probe call is let through: success
+    closes the circuit again, failure keeps it open for another period.
+    """
+
+    CLOSED, OPEN, HALF_OPEN = "closed", "open", "half_open"
+
+    def __init__(self, failure_threshold: int = 3, reset_timeout: float = 30.0):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = self.CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self._lock = threading.Lock()
+
+    @property
+    def available(self) -> bool:
+        """Whether a call would currently be let through (without claiming it)."""
+        with self._lock:
+            if self.state == self.OPEN:
+                return self.retry_in() == 0
+            return self.state == self.CLOSED
+
+    def retry_in(self) -> float:
+        return max(0.0, self.opened_at + self.reset_timeout - time.monotonic())
+
+    def allow(self) -> bool:
+        with self._lock:
+            if self.state == self.OPEN and self.retry_in() == 0:
+                self.state = self.HALF_OPEN
+                return True
+            return self.state == self.CLOSED
+
+    def record_success(self):
+        with self._lock:
+            self.state = self.CLOSED
+            self.failures = 0
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            if self.state == self.HALF_OPEN or self.failures >= self.failure_threshold:
+                self.state = self.OPEN
+                self.opened_at = time.monotonic()
+
+    def release(self):
+        """Give up a half-open probe without a verdict, e.g. when cancelled."""
+        with self._lock:
+            if self.state == self.HALF_OPEN:
+                self.state = self.OPEN
+
+
+class ResilientCaller:
+    """Runs calls to one service with a deadline, retries and a circuit breaker.
+
+    ``deadline`` bounds the whole call, retries and backoff included. With
+    ``hedge_quantile`` set, a duplicate request is started once the first has
+    been running longer than that latency percentile of recent successful
+    calls, and whichever answers first wins.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        deadline: float = 30.0,
+        retry: RetryPolicy = None,
+        breaker: CircuitBreaker = None,
+        hedge_quantile: float = None,
+        hedge_min_samples: int = 20,
+        metrics: Metrics = None,
+        max_workers: int = 8,
+    ):
+        self.name = name
+        self.deadline = deadline
+        self.retry = retry or RetryPolicy()
+        self.breaker = breaker or CircuitBreaker()
+        self.hedge_quantile = hedge_quantile
+        self.hedge_min_samples = hedge_min_samples
+        self.metrics = metrics or Metrics()
+        self.stage = f"{name}_call"
+        self.hedges = 0
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix=f"{name}-call"
+        )
+
+    @property
+    def available(self) -> bool:
+        return self.breaker.available
+
+    def hedge_delay(self):
+        if self.hedge_quantile is None:
+            return None
+        return self.metrics.quantile(
+            self.stage, self.hedge_quantile, self.hedge_min_samples
+        )
+
+    def call(self, func, *args, token=None, deadline: float = None, hedge=True, **kwargs):
+        """Call ``func(*args, **kwargs)``; raises ``CircuitOpen`` or
+        ``DeadlineExceeded`` instead of waiting indefinitely."""
+        deadline_at = time.monotonic() + (deadline or self.deadline)
+        if not self.breaker.allow():
+            raise CircuitOpen(
+                f"{self.name} is unavailable after repeated failures; "
+                f"retrying in {self.breaker.retry_in():.0f}s."
+            )
+        attempt = 0
+        while True:
+            try:
+                result = self._attempt(func, args, kwargs, deadline_at, token, hedge)
+                self.breaker.record_success()
+                return result
+            except JobCancelled:
+                self.breaker.release()
+                raise
+            except Exception as e:
+                if not self.retry.retryable(e):
+                    # The service answered; the request itself was bad
+                    self.breaker.record_success()
+                    raise
+                self.breaker.record_failure()
+                delay = self.retry.delay(attempt)
+                attempt += 1
+                if (
+                    attempt >= self.retry.attempts
+                    or self.breaker.state == CircuitBreaker.OPEN
+                    or time.monotonic() + delay >= deadline_at
+                ):
+                    raise
+            if token is not None:
+                if token.wait(delay):
+                    raise JobCancelled()
+            else:
+                time.sleep(delay)
+
+    def _attempt(self, func, args, kwargs, deadline_at, token, hedge):
+        started = time.monotonic()
+        futures = {self._executor.submit(func, *args, **kwargs)}
+        hedge_delay = self.hedge_delay() if hedge else None
+        hedge_at = started + hedge_delay if hedge_delay is not None else None
+        error = None
+        while True:
+            if token is not None:
+                token.raise_if_cancelled()
+            now = time.monotonic()
+            if now >= deadline_at:
+                for future in futures:
+                    future.cancel()
+                raise DeadlineExceeded(f"{self.name} did not answer in time.")
+            wake_at = deadline_at if hedge_at is None else min(deadline_at, hedge_at)
+            done, futures = wait(
+                futures, timeout=min(wake_at - now, 0.1), return_when=FIRST_COMPLETED
+            )
+            for future in done:
+                if future.exception() is None:
+                    for other in futures:
+                        other.cancel()
+                    self.metrics.record(self.stage, time.monotonic() - started)
+                    return future.result()
+                error = future.exception()
+            if not futures:
+                raise error
+            if hedge_at is not None and time.monotonic() >= hedge_at:
+                hedge_at = None
+                self.hedges += 1
+                futures.add(self._executor.submit(func, *args, **kwargs))
+
+    def close(self):
+        self._executor.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,498 @@
+"""Local HTTP service that drives the screen reader agent for scripts and tools.
+
+Usage::
+
+    python service.py --port 8765 --workers 4
+
+Endpoints (JSON unless noted):
+
+- ``POST /jobs`` queues a job and returns ``{"id": ...}`` straight away.
+  Bodies look like ``{"type": "read", "mode": "window", "query": "..."}``.
+  Types are ``capture``, ``analyze`` (of the live screen, or of a base64
+  ``image``), ``read`` (capture, analyze and speak), ``speak`` (``text``)
+  and ``what_changed``. An optional ``"client"`` (or an ``X-Client-Id``
+  header) names the conversation the job belongs to, so follow-up
+  questions see that client's earlier turns.
+- ``GET /jobs/<id>`` returns the job's state and result.
+- ``DELETE /jobs/<id>`` cancels it.
+- ``GET /jobs/<id>/events`` streams that job's events, and ``GET /events``
+  streams every event, as Server-Sent Events. A job's stream starts with
+  the events it has already published, so subscribing late loses nothing.
+- ``GET /metrics`` returns stage latencies as Prometheus text.
+
+Jobs from every client run on one worker pool against one agent, so the
+analysis cache, TTS audio cache and frame history are shared between them.
+Conversation history is not: each ``client`` gets its own, and a job
+without one starts from an empty conversation.
+The server only listens on localhost unless told otherwise. Every request
+needs an ``Authorization: Bearer <token>`` header; the token is ``--token``,
+or one generated on first start, saved as ``service_token`` in the settings
+file and printed on startup. Requests whose ``Host`` is not the server's own
+or whose ``Origin`` is a foreign one are refused, and ``POST`` bodies must be
+``application/json``, so web pages open in a browser cannot reach the agent
+(by cross-site requests or DNS rebinding) even without the token.
+"""
+
+import argparse
+import base64
+import contextvars
+import hmac
+import io
+import itertools
+import json
+import os
+import queue
+import secrets
+import threading
+import time
+from collections import OrderedDict, deque
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlsplit
+
+from PIL import Image
+
+from batch import resolve_api_key
+from engine import CancelToken, JobCancelled
+
+JOB_TYPES = ("capture", "analyze", "read", "speak", "what_changed")
+LOCAL_HOSTS = ("localhost", "127.0.0.1", "::1")
+# Id of the job whose code is running, for tagging the events it publishes
+CURRENT_JOB = contextvars.ContextVar("service_job", default=None)
+
+
+class EventHub:
+    """Fans agent events out to any number of subscribers.
+
+    Each subscriber gets a bounded queue; a client that stops reading loses
+    its oldest events instead of holding up the agent.
+    """
+
+    def __init__(self, max_queued: int = 1000):
+        self.max_queued = max_queued
+        self._subscribers = {}
+        self._lock = threading.Lock()
+
+    def subscribe(self, job_id: str = None, backlog=()) -> queue.Queue:
+        """Register a subscriber, starting with ``backlog`` (events it missed)."""
+        events = queue.Queue(self.max_queued)
+        for event in list(backlog)[-self.max_queued :]:
+            events.put_nowait(event)
+        with self._lock:
+            self._subscribers[events] = job_id
+        return events
+
+    def unsubscribe(self, events: queue.Queue):
+        with self._lock:
+            self._subscribers.pop(events, None)
+
+    def publish(self, event: dict):
+        event.setdefault("time", time.time())
+        with self._lock:
+            targets = [
+                q for q, job_id in self._subscribers.items()
+                if job_id is None or job_id == event.get("job")
+            ]
+        for events in targets:
+            while True:
+                try:
+                    events.put_nowait(event)
+                    break
+                except queue.Full:
+                    try:
+                        events.get_nowait()
+                    except queue.Empty:
+                        pass
+
+
+class ServiceJob:
+    def __init__(self, job_id: str, kind: str, params: dict, client: str = None):
+        self.id = job_id
+        self.kind = kind
+        self.params = params
+        self.client = client
+        self.state = "pending"
+        self.result = None
+        self.error = None
+        self.token = CancelToken()
+        self.events = deque(maxlen=500)  # Replayed to clients that subscribe late
+        self.created = time.time()
+        self.finished = None
+
+    def to_dict(self) -> dict:
+        return {
+            "id": self.id,
+            "type": self.kind,
+            "state": self.state,
+            "result": self.result,
+            "error": self.error,
+            "created": self.created,
+            "finished": self.finished,
+        }
+
+
+class AgentService:
+    """Runs agent jobs for many clients on a shared worker pool."""
+
+    def __init__(
+        self, agent, workers: int = 4, max_jobs: int = 1000, max_sessions: int = 100
+    ):
+        self.agent = agent
+        self.hub = EventHub()
+        self.executor = ThreadPoolExecutor(workers, thread_name_prefix="service-job")
+        self.max_jobs = max_jobs
+        self.max_sessions = max_sessions
+        self.jobs = OrderedDict()
+        self.sessions = OrderedDict()  # client -> SessionContext, least recent first
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+        self._publish_lock = threading.Lock()
+        agent.status_callback = self._on_status
+        agent.response_callback = self._on_response
+        agent.response_part_callback = self._on_response_part
+
+    # Agent callbacks run on job threads or on helper threads the agent starts
+    # in a copy of the job's context, so events carry the id of their job.
+    def _current_job(self):
+        return CURRENT_JOB.get()
+
+    def publish(self, event: dict):
+        with self._publish_lock:
+            job = self.jobs.get(event.get("job"))
+            if job is not None:
+                event.setdefault("time", time.time())
+                job.events.append(event)
+            self.hub.publish(event)
+
+    def subscribe(self, job_id: str = None) -> queue.Queue:
+        with self._publish_lock:
+            job = self.jobs.get(job_id)
+            return self.hub.subscribe(job_id, job.events if job is not None else ())
+
+    def _on_status(self, message):
+        self.publish({"type": "status", "job": self._current_job(), "message": message})
+
+    def _on_response(self, role, content):
+        self.publish(
+            {"type": "response", "job": self._current_job(), "role": role, "content": content}
+        )
+
+    def _on_response_part(self, role, content, done):
+        self.publish(
+            {
+                "type": "response_part",
+                "job": self._current_job(),
+                "role": role,
+                "content": content,
+                "done": done,
+            }
+        )
+
+    def submit(self, kind: str, params: dict, client: str = None) -> ServiceJob:
+        if kind not in JOB_TYPES:
+            raise ValueError(f"Unknown job type {kind!r}; expected one of {JOB_TYPES}.")
+        with self._lock:
+            job = ServiceJob(f"job-{next(self._ids)}", kind, params, client)
+            self.jobs[job.id] = job
+            while len(self.jobs) > self.max_jobs:
+                oldest = next(iter(self.jobs.values()))
+                if oldest.finished is None:
+                    break
+                self.jobs.popitem(last=False)
+        self.publish({"type": "state", "job": job.id, "state": job.state})
+        self.executor.submit(self._run, job)
+        return job
+
+    def cancel(self, job_id: str) -> bool:
+        job = self.jobs.get(job_id)
+        if job is None:
+            return False
+        job.token.cancel()
+        return True
+
+    def session_for(self, client: str = None):
+        """The conversation of ``client``, or a fresh one for anonymous jobs."""
+        if client is None:
+            return self.agent.new_session()
+        with self._lock:
+            session = self.sessions.get(client)
+            if session is None:
+                session = self.sessions[client] = self.agent.new_session()
+            self.sessions.move_to_end(client)
+            while len(self.sessions) > self.max_sessions:
+                self.sessions.popitem(last=False)
+            return session
+
+    def _run(self, job: ServiceJob):
+        job_context = CURRENT_JOB.set(job.id)
+        try:
+            if job.token.cancelled:
+                raise JobCancelled()
+            job.state = "running"
+            self.publish({"type": "state", "job": job.id, "state": job.state})
+            with self.agent.use_session(self.session_for(job.client)):
+                job.result = getattr(self, f"_job_{job.kind}")(job)
+            job.state = "cancelled" if job.token.cancelled else "done"
+        except JobCancelled:
+            job.state = "cancelled"
+        except Exception as e:
+            job.state, job.error = "error", str(e)
+        finally:
+            CURRENT_JOB.reset(job_context)
+            job.finished = time.time()
+            self.publish(
+                {"type": "state", "job": job.id, "state": job.state, "error": job.error}
+            )
+
+    def _capture(self, params: dict) -> Image.Image:
+        if params.get("image"):
+            return Image.open(io.BytesIO(base64.b64decode(params["image"]))).convert("RGB")
+        if params.get("mode") == "window":
+            return self.agent.capture_active_window()
+        return self.agent.capture_screen()
+
+    def _job_capture(self, job):
+        image = self._capture(job.params)
+        result = {"width": image.width, "height": image.height, "frame_key": self.agent.frame_key(image)}
+        if job.params.get("include_image"):
+            buffer = io.BytesIO()
+            image.save(buffer, format="PNG")
+            result["image"] = base64.b64encode(buffer.getvalue()).decode("ascii")
+        return result
+
+    def _job_analyze(self, job):
+        image = self._capture(job.params)
+        job.token.raise_if_cancelled()
+
+        def on_text(fragment):
+            self._on_response_part("assistant", fragment, False)
+
+        stream = job.params.get("stream", True)
+        analysis = self.agent.analyze_screen_with_vision_llm(
+            image, job.params.get("query"), on_text=on_text if stream else None, token=job.token
+        )
+        if stream:
+            self._on_response_part("assistant", "", True)
+        if job.params.get("speak"):
+            self.agent.speak_text(analysis, job.token)
+        return {"analysis": analysis}
+
+    def _job_read(self, job):
+        if job.params.get("image"):
+            job.params = dict(job.params, speak=True)
+            return self._job_analyze(job)
+        # The same path as the Read buttons: streamed or not, per the settings
+        self.agent.smart_read_screen(
+            job.params.get("mode", "screen"), job.params.get("query"), job.token
+        )
+        return {"read": True}
+
+    def _job_speak(self, job):
+        self.agent.speak_text(job.params["text"], job.token)
+        return {"spoken": not job.token.cancelled}
+
+    def _job_what_changed(self, job):
+        self.agent.describe_history(job.params.get("seconds"), job.token)
+        return {"frames": self.agent.history.stats()}
+
+    def shutdown(self):
+        for job in list(self.jobs.values()):
+            job.token.cancel()
+        self.executor.shutdown(wait=False, cancel_futures=True)
+        self.agent.shutdown()
+
+
+def host_name(value: str) -> str:
+    """The host of a ``Host`` header or origin, without port or brackets."""
+    if "//" not in value:
+        value = f"//{value}"
+    try:
+        return (urlsplit(value).hostname or "").lower()
+    except ValueError:
+        return ""
+
+
+def make_handler(service: AgentService, auth_token: str, hosts=LOCAL_HOSTS):
+    """Request handler for ``service``. ``auth_token`` is required on every
+    request, and ``hosts`` are the names the server may be addressed by."""
+    allowed = {host.lower() for host in hosts}
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def log_message(self, *args):
+            pass
+
+        def _authorized(self) -> bool:
+            # A page on another site (or one rebound to this address) has a
+            # foreign Origin or Host, even where it could guess the token
+            if host_name(self.headers.get("Host", "")) not in allowed:
+                self._send_json(403, {"error": "Unknown Host."})
+                return False
+            origin = self.headers.get("Origin")
+            if origin is not None and host_name(origin) not in allowed:
+                self._send_json(403, {"error": "Cross-origin requests are not allowed."})
+                return False
+            header = self.headers.get("Authorization", "")
+            if not hmac.compare_digest(header.encode(), f"Bearer {auth_token}".encode()):
+                self._send_json(401, {"error": "Missing or wrong bearer token."})
+                return False
+            return True
+
+        def _send_json(self, status: int, payload, content_type="application/json"):
+            body = payload if isinstance(payload, bytes) else json.dumps(payload).encode()
+            self.send_response(status)
+            self.send_header("Content-Type", content_type)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def _stream_events(self, job_id: str = None):
+            events = service.subscribe(job_id)
+            self.send_response(200)
+            self.send_header("Content-Type", "text/event-stream")
+            self.send_header("Cache-Control", "no-cache")
+            self.send_header("Connection", "close")
+            self.end_headers()
+            self.close_connection = True
+            try:
+                while True:
+                    try:
+                        event = events.get(timeout=15)
+                    except queue.Empty:
+                        self.wfile.write(b": keep-alive\n\n")
+                        self.wfile.flush()
+                        continue
+                    self.wfile.write(f"data: {json.dumps(event)}\n\n".encode())
+                    self.wfile.flush()
+                    if (
+                        job_id
+                        and event.get("type") == "state"
+                        and event.get("state") in ("done", "error", "cancelled")
+                    ):
+                        break
+            except (BrokenPipeError, ConnectionResetError):
+                pass
+            finally:
+                service.hub.unsubscribe(events)
+
+        def do_GET(self):
+            if not self._authorized():
+                return
+            parts = self.path.strip("/").split("/")
+            if parts == ["health"]:
+                self._send_json(200, {"status": "ok", "jobs": len(service.jobs)})
+            elif parts == ["metrics"]:
+                text = service.agent.metrics.to_prometheus().encode()
+                self._send_json(200, text, "text/plain; version=0.0.4")
+            elif parts == ["events"]:
+                self._stream_events()
+            elif len(parts) == 2 and parts[0] == "jobs" and parts[1] in service.jobs:
+                self._send_json(200, service.jobs[parts[1]].to_dict())
+            elif len(parts) == 3 and parts[0] == "jobs" and parts[2] == "events":
+                if parts[1] not in service.jobs:
+                    self._send_json(404, {"error": "No such job."})
+                else:
+                    self._stream_events(parts[1])
+            else:
+                self._send_json(404, {"error": "Not found."})
+
+        def do_POST(self):
+            if not self._authorized():
+                return
+            if self.path.rstrip("/") != "/jobs":
+                self._send_json(404, {"error": "Not found."})
+                return
+            content_type = self.headers.get("Content-Type", "").split(";")[0].strip().lower()
+            if content_type != "application/json":
+                self._send_json(415, {"error": "Send the job as application/json."})
+                return
+            try:
+                length = int(self.headers.get("Content-Length", 0))
+                params = json.loads(self.rfile.read(length) or b"{}")
+                client = params.pop("client", None) or self.headers.get("X-Client-Id")
+                job = service.submit(params.pop("type", "read"), params, client)
+            except (ValueError, json.JSONDecodeError) as e:
+                self._send_json(400, {"error": str(e)})
+                return
+            self._send_json(202, {"id": job.id, "events": f"/jobs/{job.id}/events"})
+
+        def do_DELETE(self):
+            if not self._authorized():
+                return
+            parts = self.path.strip("/").split("/")
+            if len(parts) == 2 and parts[0] == "jobs" and service.cancel(parts[1]):
+                self._send_json(200, service.jobs[parts[1]].to_dict())
+            else:
+                self._send_json(404, {"error": "No such job."})
+
+    return Handler
+
+
+def load_settings(path: str = "app_settings.json") -> dict:
+    try:
+        with open(path, "r") as f:
+            return json.load(f)
+    except (IOError, json.JSONDecodeError):
+        return {}
+
+
+def service_token(settings: dict, path: str = "app_settings.json") -> str:
+    """The saved service token, or a new one saved to the settings file."""
+    token = settings.get("service_token")
+    if not token:
+        token = settings["service_token"] = secrets.token_urlsafe(32)
+        with open(path, "w") as f:
+            json.dump(settings, f, indent=4)
+    return token
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Serve the screen reader agent over HTTP.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--workers", type=int, default=4, help="Jobs run in parallel.")
+    parser.add_argument(
+        "--allow-host",
+        action="append",
+        default=[],
+        help="Also accept requests addressed to this host name (repeatable).",
+    )
+    parser.add_argument(
+        "--token", help="Bearer token to require (default: the one saved in the settings)."
+    )
+    args = parser.parse_args(argv)
+
+    from app import AIScreenReaderAgent
+
+    settings = load_settings()
+    google_api_key = resolve_api_key()
+    if not google_api_key:
+        parser.error("No Google API key: set GOOGLE_API_KEY or save one in the app settings.")
+    agent = AIScreenReaderAgent()
+    agent.configure(
+        google_api_key,
+        os.environ.get("MURF_API_KEY") or settings.get("murf_api_key"),
+        settings.get("tts_provider", "pyttsx3"),
+        settings.get("murf_voice_id", "en-US-natalie"),
+    )
+    service = AgentService(agent, workers=args.workers)
+    agent.warm_up()
+
+    token = args.token or service_token(settings)
+    hosts = LOCAL_HOSTS + (args.host, *args.allow_host)
+    server = ThreadingHTTPServer((args.host, args.port), make_handler(service, token, hosts))
+    server.daemon_threads = True
+    print(f"Serving the screen reader agent on http://{args.host}:{args.port}")
+    print(f"Send 'Authorization: Bearer {token}' with every request.")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        service.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,135 @@
+"""Conversation state shared across reads of the same screen."""
+
+import threading
+
+# Reply the model gives when a text-only follow-up needs the actual image
+NEED_SCREEN = "NEED_SCREEN"
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough token count (about four characters per token)."""
+    return len(text) // 4 + 1
+
+
+class SessionContext:
+    """Keeps the last analyzed frame and a token-budgeted multi-turn history.
+
+    While the screen stays the same, the earlier analysis stands in for the
+    image, so follow-up questions can be answered with a text-only request.
+    When the history grows past ``token_budget``, the oldest turns are folded
+    into a running summary by ``summarize``, or simply truncated without one.
+    Summarizing runs on a background thread, so ``add_turn`` never waits on
+    it; until it finishes, the folded turns are still part of the history.
+    ``capture_mode`` is what the last read captured ("screen" or "window"),
+    so a follow-up question captures the same thing and can match its frame.
+    """
+
+    def __init__(self, token_budget: int = 2000, summarize=None, keep_turns: int = 4):
+        self.token_budget = token_budget
+        self.summarize = summarize
+        self.keep_turns = keep_turns
+        self.frame_key = None
+        self.frame_description = None
+        self.capture_mode = "screen"
+        self._frame_details = []  # Later answers about the same frame, oldest first
+        self.summary = ""
+        self.turns = []
+        self._folding = []  # Turns being summarized in the background
+        self._generation = 0
+        self._lock = threading.Lock()
+
+    def has_frame(self, frame_key: str) -> bool:
+        return frame_key is not None and frame_key == self.frame_key
+
+    def record_frame(self, frame_key: str, description: str):
+        with self._lock:
+            self.frame_key = frame_key
+            self.frame_description = description
+            self._frame_details = [description]
+
+    def add_frame_detail(self, frame_key: str, detail: str):
+        """Add what an answer said about the recorded frame to its description.
+
+        The first description is always kept; the oldest details are dropped
+        once the description would take more than ``token_budget`` tokens.
+        """
+        with self._lock:
+            if not self.has_frame(frame_key):
+                return
+            details = self._frame_details + [detail]
+            while len(details) > 2 and estimate_tokens("\n".join(details)) > self.token_budget:
+                del details[1]
+            self._frame_details = details
+            # One long answer on its own is cut short rather than dropped
+            self.frame_description = "\n".join(details)[: self.token_budget * 4]
+
+    def add_turn(self, role: str, text: str):
+        with self._lock:
+            self.turns.append((role, text))
+            self._start_fold()
+
+    def _start_fold(self):
+        """Fold the oldest turns away if over budget (called with the lock held)."""
+        if (
+            self._folding
+            or self._tokens() <= self.token_budget
+            or len(self.turns) <= self.keep_turns
+        ):
+            return
+        self._folding = self.turns[: -self.keep_turns]
+        self.turns = self.turns[-self.keep_turns :]
+        args = (self.summary, list(self._folding), self._generation)
+        threading.Thread(target=self._fold, args=args, name="session-summary", daemon=True).start()
+
+    def _fold(self, previous: str, older: list, generation: int):
+        older_text = "\n".join(f"{role}: {text}" for role, text in older)
+        summary = None
+        if self.summarize:
+            try:
+                summary = self.summarize(f"{previous}\n{older_text}".strip())
+            except Exception:
+                summary = None
+        if not summary:
+            # Keep the most recent part of what would have been summarized
+            summary = f"{previous}\n{older_text}".strip()[-self.token_budget :]
+        with self._lock:
+            if generation == self._generation:
+                self.summary = summary
+                self._folding = []
+                self._start_fold()  # Turns added meanwhile may be over budget
+
+    def _tokens(self) -> int:
+        return estimate_tokens(self.summary) + sum(
+            estimate_tokens(text) for _, text in self.turns
+        )
+
+    def history_text(self) -> str:
+        with self._lock:
+            parts = []
+            if self.summary:
+                parts.append(f"Summary of the earlier conversation: {self.summary}")
+            parts.extend(
+                f"{role.capitalize()}: {text}" for role, text in self._folding + self.turns
+            )
+        return "\n".join(parts)
+
+    def follow_up_prompt(self, system_prompt: str, question: str) -> str:
+        return (
+            f"{system_prompt}\n\n"
+            f"The screen has not changed since you described it as follows:\n"
+            f"{self.frame_description}\n\n"
+            f"{self.history_text()}\n\n"
+            f'Answer the user\'s follow-up question: "{question}"\n'
+            f"If the description above does not contain enough detail to answer, "
+            f"reply with exactly {NEED_SCREEN}."
+        )
+
+    def clear(self):
+        with self._lock:
+            self.frame_key = self.frame_description = None
+            self.capture_mode = "screen"
+            self._frame_details = []
+            self.summary = ""
+            self.turns = []
+            self._folding = []
+            self._generation += 1
@@ -0,0 +1,172 @@
+"""Sentence segmentation and TTS chunking for model output.
+
+``SentenceSegmenter`` splits streamed text into sentences, and
+``chunk_sentences`` packs sentences into TTS requests whose size starts small
+and grows, so the first audio chunk comes back quickly while later chunks
+still use few requests. Both work in a single pass over the text.
+"""
+
+import re
+
+FIRST_CHUNK_CHARS = 160
+MAX_CHUNK_CHARS = 2800
+
+# Terminal punctuation (plus closing quotes, brackets or markdown emphasis)
+# followed by whitespace, or a run of newlines.
+_BOUNDARY = re.compile(r"[.!?][\"'”’)\]*_`]*\s+|\n+")
+
+# Words ending in a period that do not end a sentence
+ABBREVIATIONS = {
+    "mr.", "mrs.", "ms.", "dr.", "prof.", "sr.", "jr.", "st.", "vs.", "cf.",
+    "e.g.", "i.e.", "fig.", "approx.", "dept.", "est.", "ca.",
+}
+_DOTTED = re.compile(r"(?:[a-z]\.){2,}$")  # U.S., a.k.a.
+_LIST_NUMBER = re.compile(r"\d{1,3}\.$")
+
+# Markdown that should not be read aloud
+_LINK = re.compile(r"\[([^\]]*)\]\([^)]*\)")
+_HEADING_OR_BULLET = re.compile(r"^\s*(?:#{1,6}|[-*+>])\s+", re.MULTILINE)
+_EMPHASIS = re.compile(r"\*+|`+|(?<!\w)_+|_+(?!\w)|^\s*(?:-{3,}|\|)|\|", re.MULTILINE)
+
+
+def _is_boundary(text: str, match) -> bool:
+    """Check whether a punctuation match really ends the sentence."""
+    if text[match.start()] != ".":
+        return True
+    word_start = max(text.rfind(" ", 0, match.start()), text.rfind("\n", 0, match.start())) + 1
+    word = text[word_start : match.start() + 1].lstrip("(\"'*_").lower()
+    if word in ABBREVIATIONS or _DOTTED.match(word):
+        return False
+    if _LIST_NUMBER.match(word):
+        # "2. " opening a line numbers a list item rather than ending a sentence
+        # (only indentation may precede it, so a short look back is enough)
+        lookback = max(0, word_start - 80)
+        newline = text.rfind("\n", lookback, word_start)
+        if newline < 0 and lookback > 0:
+            return True
+        return text[newline + 1 : word_start].strip() != ""
+    return True
+
+
+class SentenceSegmenter:
+    """Turns a stream of text fragments into complete sentences.
+
+    ``feed`` returns the sentences completed by the new fragment and keeps the
+    unfinished tail buffered until more text arrives or ``flush`` is called.
+    Abbreviations, decimal numbers and list numbers do not end a sentence;
+    newlines always do, so list items and headings come out on their own.
+    Only new text is scanned, and a tail longer than ``max_chars`` is cut at
+    a space, so the total work stays linear in the length of the stream.
+    ``feed_with_breaks`` also says what separated each sentence from the
+    next, so the text can be laid out again with its line breaks.
+    """
+
+    def __init__(self, max_chars: int = MAX_CHUNK_CHARS):
+        self.max_chars = max_chars
+        self._buffer = ""
+        self._scan_from = 0
+
+    def feed(self, fragment: str) -> list:
+        return [sentence for sentence, _ in self.feed_with_breaks(fragment) if sentence]
+
+    def feed_with_breaks(self, fragment: str) -> list:
+        """Like ``feed``, but returns (sentence, separator) pairs, where the
+        separator is " ", or one or two newlines for a line or paragraph break.
+        The sentence is empty when a fragment only continues a break."""
+        self._buffer += fragment
+        text = self._buffer
+        sentences = []
+        start = 0
+        for match in _BOUNDARY.finditer(text, self._scan_from):
+            if not _is_boundary(text, match):
+                continue
+            raw = text[start : match.end()]
+            sentence = raw.strip()
+            newlines = min(2, raw[len(raw.rstrip()) :].count("\n"))
+            if sentence:
+                sentences.append((sentence, "\n" * newlines or " "))
+            elif newlines:
+                # The rest of a paragraph break split across fragments
+                sentences.append(("", "\n"))
+            start = match.end()
+        while len(text) - start > self.max_chars:
+            cut = text.rfind(" ", start, start + self.max_chars)
+            cut = cut if cut > start else start + self.max_chars
+            sentences.append((text[start:cut].strip(), " "))
+            start = cut
+        self._buffer = text[start:]
+        # A boundary can straddle fragments: "end." + "** Next"
+        self._scan_from = max(0, len(self._buffer) - 8)
+        return sentences
+
+    def flush(self) -> list:
+        tail, self._buffer = self._buffer.strip(), ""
+        self._scan_from = 0
+        return [tail] if tail else []
+
+
+def iter_sentences(text: str, max_chars: int = MAX_CHUNK_CHARS):
+    """Yield the sentences of a complete text."""
+    segmenter = SentenceSegmenter(max_chars)
+    yield from segmenter.feed(text)
+    yield from segmenter.flush()
+
+
+def _split_long(sentence: str, limit: int) -> list:
+    """Split a sentence longer than ``limit`` at clause breaks, else at spaces."""
+    parts = []
+    while len(sentence) > limit:
+        cut = max(sentence.rfind(sep, 0, limit) for sep in (", ", "; ", ": "))
+        cut = cut + 1 if cut > limit // 3 else sentence.rfind(" ", 0, limit)
+        if cut <= 0:
+            cut = limit
+        parts.append(sentence[:cut].strip())
+        sentence = sentence[cut:].strip()
+    parts.append(sentence)
+    return parts
+
+
+def chunk_sentences(
+    sentences,
+    first_chars: int = FIRST_CHUNK_CHARS,
+    max_chars: int = MAX_CHUNK_CHARS,
+    growth: float = 2.0,
+    eager_first: bool = False,
+):
+    """Pack sentences into TTS chunks of increasing size.
+
+    The first chunk holds at most ``first_chars`` characters (a long first
+    sentence is split at a clause break), and every following chunk may be
+    ``growth`` times larger than the one before, up to ``max_chars``.
+    A chunk is only complete once the next sentence does not fit, so with a
+    streamed iterable it waits for that sentence; ``eager_first`` makes the
+    first chunk just the first sentence (or as much of it as fits), yielded
+    as soon as it arrives.
+    """
+    limit = first_chars
+    current, size = [], 0
+    first = True
+    for sentence in sentences:
+        pieces = _split_long(sentence, limit if first else max_chars)
+        for piece in pieces:
+            if current and size + 1 + len(piece) > limit:
+                yield " ".join(current)
+                first = False
+                limit = min(max_chars, int(limit * growth))
+                current, size = [], 0
+            current.append(piece)
+            size += len(piece) + (1 if size else 0)
+        if first and eager_first and current:
+            yield " ".join(current)
+            first = False
+            limit = min(max_chars, int(limit * growth))
+            current, size = [], 0
+    if current:
+        yield " ".join(current)
+
+
+def clean_for_speech(text: str) -> str:
+    """Drop markdown syntax (headings, bullets, emphasis, link URLs) before TTS."""
+    text = _LINK.sub(r"\1", text)
+    text = _HEADING_OR_BULLET.sub("", text)
+    return _EMPHASIS.sub("", text)
@@ -0,0 +1,73 @@
+"""Bounded conversation transcript with older turns paged out to disk."""
+
+import json
+import os
+import time
+from collections import deque
+
+
+class Turn:
+    def __init__(self, role: str, text: str = "", done: bool = True):
+        self.role = role
+        self.text = text
+        self.done = done
+        self.created = time.time()
+        self.mark = None  # Textbox mark at the start of the rendered turn
+
+
+class TranscriptBuffer:
+    """Ring buffer of the most recent turns.
+
+    Turns pushed out of the buffer are appended to ``archive_path`` as JSON
+    lines, so the visible transcript (and the cost of rendering it) stays
+    constant however long the session runs.
+    """
+
+    def __init__(self, max_turns: int = 200, archive_path: str = None):
+        self.max_turns = max_turns
+        self.archive_path = archive_path
+        self.turns = deque()
+        self.streaming = None
+
+    def add(self, role: str, content: str) -> Turn:
+        turn = Turn(role, content)
+        self.turns.append(turn)
+        return turn
+
+    def append_part(self, role: str, content: str, done: bool):
+        """Extend the streamed turn with a piece that carries its own spacing;
+        returns (turn, started) or (None, False)."""
+        started = False
+        if self.streaming is None or self.streaming.role != role:
+            if not content:
+                return None, False
+            self.streaming = Turn(role, done=False)
+            self.turns.append(self.streaming)
+            started = True
+        turn = self.streaming
+        if content:
+            turn.text += content
+        if done:
+            turn.done = True
+            self.streaming = None
+        return turn, started
+
+    def trim(self) -> list:
+        """Page out the oldest finished turns and return them."""
+        evicted = []
+        while len(self.turns) > self.max_turns and self.turns[0].done:
+            evicted.append(self.turns.popleft())
+        if evicted and self.archive_path:
+            with open(self.archive_path, "a", encoding="utf-8") as f:
+                for turn in evicted:
+                    record = {"time": turn.created, "role": turn.role, "text": turn.text}
+                    f.write(json.dumps(record) + "\n")
+        return evicted
+
+    def archived_turns(self, limit: int = None) -> list:
+        """Read back paged-out turns, newest last."""
+        if not self.archive_path or not os.path.exists(self.archive_path):
+            return []
+        with open(self.archive_path, "r", encoding="utf-8") as f:
+            lines = deque(f, maxlen=limit)
+        return [json.loads(line) for line in lines]
@@ -0,0 +1,111 @@
+"""Persistent, content-addressed cache of synthesized speech."""
+
+import hashlib
+import json
+import os
+import tempfile
+import threading
+from collections import OrderedDict
+
+
+def normalize_text(text: str) -> str:
+    return " ".join(text.split())
+
+
+class AudioCache:
+    """On-disk audio cache with a size cap and LRU eviction.
+
+    Entries are keyed by a hash of (normalized text, voice, style, provider)
+    and stored one file per entry. Writes go to a temporary file that is
+    renamed into place, so a crash never leaves a truncated entry behind.
+    Recency survives restarts through the files' modification times.
+    """
+
+    def __init__(self, directory: str, max_bytes: int = 200 * 1024 * 1024):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.total_bytes = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        os.makedirs(directory, exist_ok=True)
+        self._load_index()
+
+    def _load_index(self):
+        files = []
+        for name in os.listdir(self.directory):
+            path = os.path.join(self.directory, name)
+            if name.endswith(".audio") and os.path.isfile(path):
+                stat = os.stat(path)
+                files.append((stat.st_mtime, name[: -len(".audio")], stat.st_size))
+            elif name.endswith(".tmp"):
+                os.remove(path)
+        for _, key, size in sorted(files):
+            self._entries[key] = size
+            self.total_bytes += size
+
+    @staticmethod
+    def make_key(text: str, voice_id: str, style: str = None, provider: str = "murf"):
+        payload = json.dumps([normalize_text(text), voice_id, style, provider])
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, f"{key}.audio")
+
+    def get(self, text, voice_id, style=None, provider="murf"):
+        key = self.make_key(text, voice_id, style, provider)
+        with self._lock:
+            if key not in self._entries:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+        try:
+            with open(self._path(key), "rb") as f:
+                data = f.read()
+            os.utime(self._path(key))
+        except OSError:
+            with self._lock:
+                self.total_bytes -= self._entries.pop(key, 0)
+                self.misses += 1
+            return None
+        with self._lock:
+            self.hits += 1
+        return data
+
+    def put(self, text, voice_id, style, provider, data: bytes):
+        key = self.make_key(text, voice_id, style, provider)
+        if len(data) > self.max_bytes:
+            return
+        fd, tmp_path = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(data)
+            os.replace(tmp_path, self._path(key))
+        except OSError:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            return
+        with self._lock:
+            self.total_bytes += len(data) - self._entries.get(key, 0)
+            self._entries[key] = len(data)
+            self._entries.move_to_end(key)
+            self._evict()
+
+    def _evict(self):
+        while self.total_bytes > self.max_bytes and self._entries:
+            key, size = self._entries.popitem(last=False)
+            self.total_bytes -= size
+            try:
+                os.remove(self._path(key))
+            except OSError:
+                pass
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "entries": len(self._entries),
+                "bytes": self.total_bytes,
+            }
@@ -0,0 +1,189 @@
+"""Continuous screen monitoring that narrates only what changed."""
+
+import threading
+import time
+from collections import deque
+
+from engine import PRIORITY_BACKGROUND
+from frame_diff import changed_tile_hashes, tile_hashes
+
+
+class CallBudget:
+    """Sliding-window cap on how many calls may start per minute."""
+
+    def __init__(self, max_calls_per_minute: int):
+        self.max_calls = max_calls_per_minute
+        self._calls = deque()
+        self._lock = threading.Lock()
+
+    def try_acquire(self) -> bool:
+        with self._lock:
+            now = time.monotonic()
+            while self._calls and now - self._calls[0] >= 60:
+                self._calls.popleft()
+            if len(self._calls) >= self.max_calls:
+                return False
+            self._calls.append(now)
+            return True
+
+
+def changed_regions(fp, tiles: list, padding: int = 8) -> list:
+    """Group changed tiles into connected blocks and return their pixel boxes."""
+    remaining = set(tiles)
+    boxes = []
+    while remaining:
+        stack = [remaining.pop()]
+        component = []
+        while stack:
+            index = stack.pop()
+            component.append(index)
+            col, row = index % fp.cols, index // fp.cols
+            for dc, dr in ((1, 0), (-1, 0), (0, 1), (0, -1)):
+                c, r = col + dc, row + dr
+                neighbour = r * fp.cols + c
+                if 0 <= c < fp.cols and 0 <= r < fp.rows and neighbour in remaining:
+                    remaining.remove(neighbour)
+                    stack.append(neighbour)
+        tile_boxes = [fp.tile_box(i) for i in component]
+        boxes.append(
+            (
+                max(0, min(b[0] for b in tile_boxes) - padding),
+                max(0, min(b[1] for b in tile_boxes) - padding),
+                min(fp.size[0], max(b[2] for b in tile_boxes) + padding),
+                min(fp.size[1], max(b[3] for b in tile_boxes) + padding),
+            )
+        )
+    # Largest regions first so the most significant change survives truncation
+    boxes.sort(key=lambda b: (b[2] - b[0]) * (b[3] - b[1]), reverse=True)
+    return boxes
+
+
+class ScreenWatcher:
+    """Captures the screen at a fixed rate and narrates meaningful changes.
+
+    Frames are compared in ``tile_px`` squares at full resolution, so a
+    changed number is as visible as a new window. A change must touch at
+    least ``trigger_tiles`` tiles to arm the watcher and is dropped again if
+    it falls back to ``release_tiles`` (hysteresis). Once armed, no more than
+    ``release_tiles`` may change between captures for ``settle_frames``
+    captures before anything is sent (debounce), so a blinking caret, flicker
+    and animations in progress do not cost an API call.
+    """
+
+    def __init__(
+        self,
+        agent,
+        fps: float = 1.0,
+        max_calls_per_minute: int = 4,
+        trigger_tiles: int = 2,
+        release_tiles: int = 1,
+        settle_frames: int = 2,
+        max_regions: int = 4,
+        tile_px: int = 32,
+    ):
+        self.agent = agent
+        self.interval = 1.0 / fps
+        self.budget = CallBudget(max_calls_per_minute)
+        self.trigger_tiles = trigger_tiles
+        self.release_tiles = release_tiles
+        self.tile_px = tile_px
+        self.settle_frames = settle_frames
+        self.max_regions = max_regions
+        self.context = ""
+        self.job = None
+        self._stop = threading.Event()
+        self._thread = None
+
+    @property
+    def running(self) -> bool:
+        return (
+            self._thread is not None
+            and self._thread.is_alive()
+            and not self._stop.is_set()
+        )
+
+    def start(self):
+        if self.running:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+        self.agent.log_status("Watching the screen for changes...")
+
+    def stop(self, wait: bool = False):
+        """Stop watching; with ``wait``, return once the last capture is handled."""
+        self._stop.set()
+        if self.job is not None:
+            self.job.cancel()
+        if wait and self._thread is not None:
+            self._thread.join()
+        self.agent.log_status("Stopped watching the screen.")
+
+    def _run(self):
+        baseline = previous = None
+        target = None
+        armed = False
+        still_frames = 0
+        while not self._stop.wait(self.interval):
+            try:
+                # The agent's own windows change with everything it says;
+                # left in, its narration would keep triggering more narration
+                image = self.agent.without_own_windows(self.agent.capture_screen())
+            except Exception as e:
+                self.agent.log_status(f"Watch capture error: {e}")
+                continue
+            if image.info.get("target", "primary") != target:
+                # The capture target changed: its frames cannot be compared
+                # with the old target's, so start from a new baseline
+                target = image.info.get("target", "primary")
+                baseline = previous = None
+                armed = False
+            fp = tile_hashes(image, self.tile_px, previous)
+            if baseline is None:
+                baseline = previous = fp
+                continue
+
+            delta = changed_tile_hashes(baseline, fp)
+            motion = len(changed_tile_hashes(previous, fp))
+            previous = fp
+
+            if not armed:
+                if len(delta) < self.trigger_tiles:
+                    continue
+                armed, still_frames = True, 0
+            elif len(delta) <= self.release_tiles:
+                armed = False
+                continue
+
+            still_frames = still_frames + 1 if motion <= self.release_tiles else 0
+            if still_frames < self.settle_frames or not self.budget.try_acquire():
+                continue
+
+            regions = changed_regions(fp, delta)[: self.max_regions]
+            self._narrate([image.crop(box) for box in regions])
+            baseline, armed = fp, False
+
+    def _narrate(self, crops: list):
+        # Described in an engine job, so "Stop" and ``stop`` can cancel it
+        self.job = self.agent.engine.submit(
+            "watch-describe",
+            self.agent.describe_screen_changes,
+            crops,
+            self.context,
+            priority=PRIORITY_BACKGROUND,
+        )
+        if self.job is None:
+            return
+        description = self.job.wait()
+        if self.job.state != "done" or self._stop.is_set():
+            return
+        if not description or description.strip().upper().startswith("NO_CHANGE"):
+            return
+        self.context = description[-500:]
+        self.agent.log_response("assistant", description)
+        self.agent.engine.submit(
+            "watch-narration",
+            self.agent.speak_narration,
+            description,
+            priority=PRIORITY_BACKGROUND,
+        )